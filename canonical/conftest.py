@@ -88,3 +88,11 @@ class MockResponse:
     def raise_for_status(self):
         if self.status_code != 200:
             return HTTPError
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    files_dir = tmp_path / "files"
+    files_dir.mkdir()
+    return files_dir
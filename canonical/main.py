@@ -1,11 +1,168 @@
 """ Main Script for Getting Debian Packages based on Architecture from Command Line """
 
+import argparse
 import os
+import sys
 
+from modules.aggregate import ArchMatrix
+from modules.cache import CacheStore
 from modules.cmdline_parser import args_parser
-from modules.downloader import Downloader
+from modules.decompressor import benchmark, get_decompressor
+from modules.downloader import DEFAULT_BASE_URL, Downloader
+from modules.exceptions import CanonicalError
+from modules.fingerprint import diff_snapshots, read_snapshot
 from modules.logger import def_logger
 from modules.parser import Parser
+from modules.partial import (
+    PartialResult,
+    data_size,
+    map_shard,
+    reduce_partials,
+    shard_range,
+)
+
+
+def cache_command(args: argparse.Namespace) -> None:
+    """
+    Show or prune the contents of the files cache
+    Args:
+        args: parsed arguments of the 'cache' subcommand
+    Returns:
+        None
+    """
+    cache = CacheStore(
+        max_bytes=args.cache_size,
+        compressed_only=args.compressed_only,
+        verbose=args.verbose,
+    )
+    if args.action == "prune":
+        evicted = cache.prune()
+        print(f"Evicted {len(evicted)} files")
+    print(cache)
+
+
+def diff_command(args: argparse.Namespace) -> None:
+    """
+    Output the packages added, removed & changed between two fingerprint snapshots
+    Args:
+        args: parsed arguments of the 'diff' subcommand
+    Returns:
+        None
+    """
+    _, old_packages = read_snapshot(args.old)
+    arch, new_packages = read_snapshot(args.new)
+    diff = diff_snapshots(old_packages, new_packages)
+    for change, packages in diff.items():
+        print(f"{change.upper()} ({len(packages)}):")
+        for package in packages:
+            print(f"    {package}")
+
+    if args.show_files and (diff["added"] or diff["changed"]):
+        parser = Parser(
+            architecture=arch,
+            verbose=args.verbose,
+            regex_parse=False,
+            get_contents=False,
+        )
+        contents = parser.contents_for(diff["added"] + diff["changed"])
+        for package, file_s in contents.items():
+            print(f"FILES OF '{package}' ({len(file_s)}):")
+            for file in file_s:
+                print(f"    {file}")
+
+
+def bench_command(args: argparse.Namespace) -> None:
+    """
+    Output the decompression throughput of every available backend on an archive
+    Args:
+        args: parsed arguments of the 'bench' subcommand
+    Returns:
+        None
+    """
+    print("{:<10} {:>12}".format("BACKEND", "MB/s"))
+    for name, throughput in benchmark(args.archive, repeat=args.repeat):
+        print("{:<10} {:>12.1f}".format(name, throughput))
+
+
+def map_command(args: argparse.Namespace) -> None:
+    """
+    Parse a shard of the data & write it as a partial result
+    Args:
+        args: parsed arguments of the 'map' subcommand
+    Returns:
+        None
+    """
+    start, end = 0, None
+    if args.shard is not None:
+        start, end = shard_range(data_size(args.arch, args.file_name), *args.shard)
+    elif args.byte_range is not None:
+        start, end = args.byte_range
+    partial = map_shard(
+        args.arch,
+        start=start,
+        end=end,
+        group=args.label,
+        file_name=args.file_name,
+        fingerprint=args.fingerprint,
+    )
+    partial.write(args.out)
+
+
+def reduce_command(args: argparse.Namespace) -> None:
+    """
+    Merge partial results & output the final package stats per group
+    Args:
+        args: parsed arguments of the 'reduce' subcommand
+    Returns:
+        None
+    """
+    result = reduce_partials(PartialResult.read(path) for path in args.partials)
+    if args.out is not None:
+        result.write(args.out)
+    for group in sorted(result.counts):
+        header_string, package_files_rows = Parser.format_stats(
+            group, result.top(group, args.top_n)
+        )
+        print(header_string)
+        for package_files_row in package_files_rows:
+            print(package_files_row)
+        anomalies = ", ".join(
+            f"{name}: {count}"
+            for name, count in sorted(result.anomalies[group].items())
+        )
+        print(f"Anomalies - {anomalies or 'none'}")
+
+
+def aggregate_stats(matrix: ArchMatrix, top_n: int = 10) -> None:
+    """
+    Output the top-n packages across all architectures & for the first two architectures
+    the packages whose number of files differ the most
+    Args:
+        matrix: the no of files per package & architecture
+        top_n: no of top packages required
+    Returns:
+        None
+    """
+    architectures = ", ".join(f"'{arch}'" for arch in matrix.architectures)
+    header_string, package_files_rows = Parser.format_stats(
+        architectures, matrix.top(top_n), title=f"ACROSS ARCHITECTURES {architectures}"
+    )
+    print(header_string)
+    for package_files_row in package_files_rows:
+        print(package_files_row)
+    print(
+        f"Packages in any: {len(matrix.union())}, in all: {len(matrix.intersection())}"
+    )
+
+    if len(matrix.architectures) >= 2:
+        arch_a, arch_b = matrix.architectures[:2]
+        print(
+            "DIVERGING BETWEEN '{}' AND '{}':\n{:^40} {:>30} {:>14}".format(
+                arch_a, arch_b, "PACKAGE NAME", arch_a.upper(), arch_b.upper()
+            )
+        )
+        for ind, val in enumerate(matrix.divergence(arch_a, arch_b)[:top_n]):
+            print("{:>5}. {:-<70} {:>8} {:>8}".format((ind + 1), *val))
 
 
 def main() -> None:
@@ -14,30 +171,85 @@ def main() -> None:
     Returns:
         None
     """
-    base_url = "http://ftp.uk.debian.org/debian/dists/stable/main/"
+    base_url = DEFAULT_BASE_URL
 
     # Get the architecture from command line
     args = args_parser()
 
+    subcommands = {
+        "cache": cache_command,
+        "diff": diff_command,
+        "bench": bench_command,
+        "map": map_command,
+        "reduce": reduce_command,
+    }
+    if args.command is not None:
+        subcommands[args.command](args)
+        return
+
+    decompressor = get_decompressor(args.decompressor)
+
+    cache = CacheStore(
+        max_bytes=args.cache_size,
+        compressed_only=args.compressed_only,
+        verbose=args.verbose,
+    )
+
+    matrix = ArchMatrix() if args.aggregate else None
+
     for arch in args.arch:
-        # Download and save the data
+        # Download and save the data, unless it is already in the cache
         downloader = Downloader(
-            architecture=arch, base_url=base_url, verbose=args.verbose
+            architecture=arch,
+            base_url=base_url,
+            verbose=args.verbose,
+            cache=cache,
+            decompressor=decompressor,
         )
-        downloader.initiate()
-        downloader.save_gzip()
-        downloader.save_txt()
+        if not (args.cached and cache.is_resident(downloader.gzip_filepath)):
+            downloader.initiate()
+            downloader.save_gzip()
+            downloader.save_txt()
+        elif not cache.is_resident(downloader.txt_filepath):
+            downloader.save_txt()
 
         # Parse data and Output Package Stats
         parser = Parser(
             architecture=arch,
             verbose=args.verbose,
             regex_parse=False,
-            get_contents=False,
+            get_contents=args.export == "contents",
+            cache=cache,
+            fingerprint=args.fingerprint,
+            decompressor=decompressor,
+            string_table=matrix.packages if matrix is not None else None,
         )
+        # the cached parse result has only the counts, not the fingerprints or files
+        reuse_counts = (
+            args.cached and not args.fingerprint and args.export != "contents"
+        )
+        if not (reuse_counts and parser.load_counts()):
+            parser.parse_stream()
+            parser.save_counts()
         parser.package_stats(write_to_file=True)
+        if matrix is not None:
+            matrix.add_architecture(arch, parser.package_file_dict_len.items())
+        if args.fingerprint:
+            parser.write_fingerprints()
+        if args.export is not None:
+            parser.export_columns()
+
+    if matrix is not None:
+        aggregate_stats(matrix)
+
+    # Keep the cache within its budget, the files of the architectures of this run are kept
+    cache.prune(keep=args.arch)
 
 
 if __name__ == "__main__":
     logger = def_logger(log_dir=os.getcwd())
-    main()
+    try:
+        main()
+    except CanonicalError as e:
+        logger.error(f"{e}, exiting...")
+        sys.exit(1)
@@ -0,0 +1,193 @@
+"""Cross-Architecture Aggregation of Package Stats with Shared (Interned) Package Names"""
+
+import logging
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# marks a package which does not exist for an architecture (0 is a valid - empty - package)
+ABSENT = -1
+
+
+class StringTable:
+    """Interned strings shared by all parsers, every string is stored once & gets a stable index"""
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def intern(self, value: str) -> str:
+        """
+        Get the shared instance of a string, adding it to the table if it is new
+        Args:
+            value: the string
+        Returns:
+            str: the shared instance (equal to value)
+        """
+        return self.strings[self.id(value)]
+
+    def id(self, value: str) -> int:
+        """
+        Get the index of a string, adding it to the table if it is new
+        Args:
+            value: the string
+        Returns:
+            int: index of the string in the table
+        """
+        index = self.ids.get(value)
+        if index is None:
+            index = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class ArchMatrix:
+    """Number of files as a packages x architectures integer matrix (one array per architecture)"""
+
+    def __init__(self, package_table: Optional[StringTable] = None):
+        self.packages = StringTable() if package_table is None else package_table
+        self.architectures = []
+        self.columns = []
+
+    def add_architecture(
+        self, architecture: str, counts: Iterable[Tuple[str, int]]
+    ) -> None:
+        """
+        Add the package stats of an architecture as a new column
+        Args:
+            architecture: the architecture
+            counts: (package, number of files) pairs, e.g. the items of a parser's dict
+        Returns:
+            None
+        """
+        column = array("i")
+        for package, count in counts:
+            index = self.packages.id(package)
+            if index >= len(column):
+                column.extend([ABSENT] * (index + 1 - len(column)))
+            column[index] = count
+        self.architectures.append(architecture)
+        self.columns.append(column)
+        self._pad()
+
+    def column(self, architecture: str) -> array:
+        """
+        Get the counts of an architecture, indexed by package id (ABSENT if missing)
+        Args:
+            architecture: the architecture
+        Returns:
+            array: the column of the architecture
+        """
+        self._pad()
+        return self.columns[self.architectures.index(architecture)]
+
+    def totals(self, architectures: Optional[Iterable[str]] = None) -> array:
+        """
+        Total number of files per package summed over architectures
+        Args:
+            architectures: architectures to sum over, default all
+        Returns:
+            array: totals indexed by package id
+        """
+        self._pad()
+        columns = self._columns(architectures)
+        return array(
+            "q", (sum(count for count in row if count > 0) for row in zip(*columns))
+        )
+
+    def top(
+        self, top_n: int = 10, architectures: Optional[Iterable[str]] = None
+    ) -> List[Tuple[str, int]]:
+        """
+        Top-n packages by the number of files summed over architectures
+        Args:
+            top_n: no of top packages required
+            architectures: architectures to sum over, default all
+        Returns:
+            list: reverse-sorted (desc) packages & their total no of files
+        """
+        totals = self.totals(architectures)
+        order = sorted(range(len(totals)), key=totals.__getitem__, reverse=True)
+        return [(self.packages.strings[i], totals[i]) for i in order[:top_n]]
+
+    def union(self, architectures: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Packages existing for at least one of the architectures
+        Args:
+            architectures: architectures to consider, default all
+        Returns:
+            list: package names
+        """
+        return self._select(any, architectures)
+
+    def intersection(self, architectures: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Packages existing for all of the architectures
+        Args:
+            architectures: architectures to consider, default all
+        Returns:
+            list: package names
+        """
+        return self._select(all, architectures)
+
+    def divergence(
+        self, arch_a: str, arch_b: str, min_diff: int = 1
+    ) -> List[Tuple[str, int, int]]:
+        """
+        Packages of both architectures whose number of files differ
+        Args:
+            arch_a: first architecture
+            arch_b: second architecture
+            min_diff: minimum absolute difference in the number of files
+        Returns:
+            list: (package, files in arch_a, files in arch_b), largest difference first
+        """
+        column_a, column_b = self.column(arch_a), self.column(arch_b)
+        diverging = [
+            (self.packages.strings[i], a, b)
+            for i, (a, b) in enumerate(zip(column_a, column_b))
+            if a != ABSENT and b != ABSENT and abs(a - b) >= min_diff
+        ]
+        return sorted(diverging, key=lambda x: abs(x[1] - x[2]), reverse=True)
+
+    def _columns(self, architectures: Optional[Iterable[str]]) -> List[array]:
+        """
+        Helper function: Get the columns of the given architectures
+        Args:
+            architectures: the architectures, default all
+        Returns:
+            list: the columns
+        """
+        if architectures is None:
+            return self.columns
+        return [self.column(arch) for arch in architectures]
+
+    def _select(self, combine, architectures: Optional[Iterable[str]]) -> List[str]:
+        """
+        Helper function: Select packages by combining their presence in the architectures
+        Args:
+            combine: any or all
+            architectures: the architectures, default all
+        Returns:
+            list: package names
+        """
+        self._pad()
+        return [
+            self.packages.strings[i]
+            for i, row in enumerate(zip(*self._columns(architectures)))
+            if combine(count != ABSENT for count in row)
+        ]
+
+    def _pad(self) -> None:
+        """
+        Helper function: Extend all columns to the current number of packages
+        Returns:
+            None
+        """
+        for column in self.columns:
+            if len(column) < len(self.packages):
+                column.extend([ABSENT] * (len(self.packages) - len(column)))
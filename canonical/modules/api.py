@@ -0,0 +1,181 @@
+"""Programmatic API - Reusable & Thread-Safe Client for Querying Package Stats In-Process"""
+
+import logging
+import os
+import threading
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .aggregate import ArchMatrix
+from .cache import CacheStore
+from .decompressor import Decompressor, get_decompressor
+from .downloader import DEFAULT_BASE_URL, Downloader
+from .parser import Parser
+
+logger = logging.getLogger(__name__)
+
+
+class Row(NamedTuple):
+    """A parsed row of the Contents-index"""
+
+    packages: List[str]
+    files: List[str]
+
+
+class StatsResult(NamedTuple):
+    """Package stats of an architecture"""
+
+    architecture: str
+    total_packages: int
+    total_files: int
+    top: List[Tuple[str, int]]
+
+
+class ContentsClient:
+    """
+    Client for the Contents-indices which can be created once & shared between threads,
+    no state of a query is kept on the client, errors are raised as CanonicalError subclasses,
+    the parsed counts of an architecture are kept until its archive is downloaded again
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        regex_parse: bool = False,
+        cache: Optional[CacheStore] = None,
+        decompressor: Optional[Decompressor] = None,
+    ):
+        self.base_url = base_url
+        self.regex_parse = regex_parse
+        self.cache = cache
+        self.decompressor = decompressor or get_decompressor()
+        self._download_lock = threading.Lock()
+        # architecture -> (mtime of the archive, counts, counts sorted desc), never modified
+        self._parsed = {}
+        self._parsed_lock = threading.Lock()
+
+    def fetch(self, architecture: str, refresh: bool = False) -> str:
+        """
+        Make sure the gzip file of the architecture exists locally, downloading it if needed
+        Args:
+            architecture: the architecture
+            refresh: download again even if the file exists
+        Returns:
+            str: path of the gzip file
+        Raises:
+            DownloadError: if the request fails
+            ArchitectureNotFoundError: if the architecture does not exist
+            StorageError: if the files cannot be written
+        """
+        downloader = Downloader(
+            architecture=architecture,
+            base_url=self.base_url,
+            verbose=False,
+            cache=self.cache,
+            decompressor=self.decompressor,
+        )
+        with self._download_lock:
+            if refresh or not os.path.exists(downloader.gzip_filepath):
+                downloader.initiate()
+                downloader.save_gzip()
+                # a txt file from the previous download would be stale now
+                if os.path.exists(downloader.txt_filepath):
+                    downloader.save_txt()
+        return downloader.gzip_filepath
+
+    def iter_rows(self, architecture: str) -> Iterator[Row]:
+        """
+        Stream the parsed rows of the Contents-index of an architecture
+        Args:
+            architecture: the architecture
+        Returns:
+            iterator: the rows with their package(s) & file(s)
+        """
+        parser = self._parser(architecture)
+        for line in parser.iter_lines():
+            packages, file_s = parser.parse_row(line)
+            yield Row(packages or [], file_s or [])
+
+    def iter_counts(self, architecture: str) -> Iterator[Tuple[str, int]]:
+        """
+        Stream the packages of an architecture & the no of files in them
+        Args:
+            architecture: the architecture
+        Returns:
+            iterator: (package, number of files) pairs
+        """
+        counts, _ = self._parsed_counts(architecture)
+        yield from counts.items()
+
+    def stats(self, architecture: str, top_n: Optional[int] = 10) -> StatsResult:
+        """
+        Get the package stats of an architecture
+        Args:
+            architecture: the architecture
+            top_n: no of top packages required, None for all packages
+        Returns:
+            StatsResult: totals & the reverse-sorted (desc) top-n packages
+        """
+        counts, counts_sorted = self._parsed_counts(architecture)
+        return StatsResult(
+            architecture=architecture,
+            total_packages=len(counts),
+            total_files=sum(counts.values()),
+            top=counts_sorted[:top_n],
+        )
+
+    def aggregate(self, architectures: Iterable[str]) -> ArchMatrix:
+        """
+        Get the package stats of several architectures as one matrix with shared package names
+        Args:
+            architectures: the architectures
+        Returns:
+            ArchMatrix: the no of files per package & architecture
+        """
+        matrix = ArchMatrix()
+        for architecture in architectures:
+            counts, _ = self._parsed_counts(architecture)
+            matrix.add_architecture(architecture, counts.items())
+        return matrix
+
+    def _parsed_counts(self, architecture: str) -> Tuple[dict, list]:
+        """
+        Helper function: Get the no of files per package of an architecture, parsed only
+        once per download of its archive (keyed by the mtime of the archive)
+        Args:
+            architecture: the architecture
+        Returns:
+            dict: packages as keys and the no of files in them as values, not to be modified
+            list: reverse-sorted (desc) packages & the no of files contained in them
+        """
+        parser = self._parser(architecture)
+        mtime = os.stat(parser.gzip_filename).st_mtime_ns
+        with self._parsed_lock:
+            parsed = self._parsed.get(architecture)
+        if parsed is not None and parsed[0] == mtime:
+            return parsed[1], parsed[2]
+
+        # parsed outside the lock, queries for other architectures are not blocked
+        parser.parse_stream()
+        counts = dict(parser.package_file_dict_len)
+        counts_sorted = Parser.sort_dict_len(counts, desc=True)
+        with self._parsed_lock:
+            self._parsed[architecture] = (mtime, counts, counts_sorted)
+        return counts, counts_sorted
+
+    def _parser(self, architecture: str) -> Parser:
+        """
+        Helper function: Fetch the data if needed & create a new parser for a query
+        Args:
+            architecture: the architecture
+        Returns:
+            Parser: parser for the architecture
+        """
+        self.fetch(architecture)
+        return Parser(
+            architecture=architecture,
+            verbose=False,
+            regex_parse=self.regex_parse,
+            get_contents=False,
+            cache=self.cache,
+            decompressor=self.decompressor,
+        )
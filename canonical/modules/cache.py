@@ -0,0 +1,286 @@
+"""Cache Store for Tracking & Evicting Downloaded Archives and Derived Artifacts (LRU)"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# within an architecture every other artifact is evicted before the archive itself
+ARCHIVE_KINDS = ("archive",)
+# uncompressed forms of the archive, dropped when only the compressed forms are kept
+EXPANDED_KINDS = ("index",)
+# version of the layout of the cache index file
+INDEX_VERSION = 1
+# outputs of the tool & snapshots which cannot be re-derived later - tracked but never
+# evicted & not counted towards the byte budget
+PINNED_KINDS = ("stats", "fingerprint", "export")
+
+
+class CacheStore:
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        compressed_only: bool = False,
+        verbose: bool = False,
+        index_name: str = "cache_index",
+    ):
+        self.data_dir = os.path.join(os.getcwd(), "files")
+        self.index_filepath = os.path.join(self.data_dir, index_name + ".json")
+        self.max_bytes = None
+        self.compressed_only = compressed_only
+        self.verbosity = verbose
+        self.entries = {}
+        self._lock = threading.RLock()
+        self._load_index()
+        # a given budget is stored in the index & applies to later runs without one
+        if max_bytes is not None and max_bytes != self.max_bytes:
+            self.max_bytes = max_bytes
+            self._save_index()
+
+    def register(self, filepath: str, architecture: str, kind: str) -> None:
+        """
+        Add (or refresh) a file in the cache index & mark it as just used
+        Args:
+            filepath: path of the cached file, must exist
+            architecture: the architecture the file belongs to
+            kind: type of the artifact - "archive", "index", "counts", "stats", "fingerprint"
+            or "export"
+        Returns:
+            None
+        """
+        with self._lock:
+            self.entries[os.path.basename(filepath)] = {
+                "architecture": architecture,
+                "kind": kind,
+                "size": os.path.getsize(filepath),
+                "last_access": time.time(),
+            }
+            self._save_index()
+
+    def touch(self, filepath: str) -> bool:
+        """
+        Mark a cached file as just used
+        Args:
+            filepath: path of the cached file
+        Returns:
+            bool: if the file is resident in the cache
+        """
+        with self._lock:
+            if not self.is_resident(filepath):
+                return False
+            self.entries[os.path.basename(filepath)]["last_access"] = time.time()
+            self._save_index()
+            return True
+
+    def is_resident(self, filepath: str) -> bool:
+        """
+        Check if a file is tracked by the cache & still exists on disk
+        Args:
+            filepath: path of the cached file
+        Returns:
+            bool: if the file is resident in the cache
+        """
+        return os.path.basename(filepath) in self.entries and os.path.exists(filepath)
+
+    def total_bytes(self) -> int:
+        """
+        Total size of the tracked files which count towards the byte budget
+        Returns:
+            int: size in bytes
+        """
+        return sum(
+            entry["size"]
+            for entry in self.entries.values()
+            if entry["kind"] not in PINNED_KINDS
+        )
+
+    def pinned_bytes(self) -> int:
+        """
+        Total size of the tracked files of the pinned kinds (never evicted)
+        Returns:
+            int: size in bytes
+        """
+        return sum(
+            entry["size"]
+            for entry in self.entries.values()
+            if entry["kind"] in PINNED_KINDS
+        )
+
+    def stats(self) -> dict:
+        """
+        Summarise the cache contents per architecture & artifact type
+        Returns:
+            dict: size counted towards the budget, budget, size of the pinned files &
+            per architecture sizes with their last access time
+        """
+        architectures = {}
+        for entry in self.entries.values():
+            arch = architectures.setdefault(
+                entry["architecture"], {"kinds": {}, "last_access": 0.0}
+            )
+            arch["kinds"][entry["kind"]] = (
+                arch["kinds"].get(entry["kind"], 0) + entry["size"]
+            )
+            arch["last_access"] = max(arch["last_access"], entry["last_access"])
+        pinned_entries = sum(
+            entry["kind"] in PINNED_KINDS for entry in self.entries.values()
+        )
+        return {
+            "total_bytes": self.total_bytes(),
+            "max_bytes": self.max_bytes,
+            "entries": len(self.entries) - pinned_entries,
+            "pinned_bytes": self.pinned_bytes(),
+            "pinned_entries": pinned_entries,
+            "architectures": architectures,
+        }
+
+    def prune(self, max_bytes: Optional[int] = None, keep: Iterable[str] = ()) -> list:
+        """
+        Evict files until the cache fits in the byte budget - least recently used
+        architectures first & within an architecture the derived artifacts before the archive,
+        if the store keeps only compressed forms all uncompressed archives are evicted,
+        files of the pinned kinds (the outputs) are never evicted
+        Args:
+            max_bytes: byte budget, defaults to the (stored) budget of the store (None - unlimited)
+            keep: architectures which are never evicted because of the budget
+        Returns:
+            list: names of the evicted files
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        keep = set(keep)
+        evicted = []
+        with self._lock:
+            # forget about files removed outside the store
+            for name in [
+                name
+                for name in self.entries
+                if not os.path.exists(os.path.join(self.data_dir, name))
+            ]:
+                del self.entries[name]
+
+            if self.compressed_only:
+                for name, entry in list(self.entries.items()):
+                    if entry["kind"] in EXPANDED_KINDS:
+                        evicted.append(self._evict(name))
+
+            if max_bytes is not None:
+                arch_access = {}
+                for entry in self.entries.values():
+                    arch_access[entry["architecture"]] = max(
+                        arch_access.get(entry["architecture"], 0.0),
+                        entry["last_access"],
+                    )
+                candidates = sorted(
+                    (
+                        (name, entry)
+                        for name, entry in self.entries.items()
+                        if entry["kind"] not in PINNED_KINDS
+                        and entry["architecture"] not in keep
+                    ),
+                    key=lambda x: (
+                        arch_access[x[1]["architecture"]],
+                        x[1]["kind"] in ARCHIVE_KINDS,
+                        x[1]["last_access"],
+                    ),
+                )
+                total = self.total_bytes()
+                for name, entry in candidates:
+                    if total <= max_bytes:
+                        break
+                    total -= entry["size"]
+                    evicted.append(self._evict(name))
+            self._save_index()
+
+        if self.verbosity and evicted:
+            logger.info(f"Evicted from cache: {', '.join(evicted)}")
+        return evicted
+
+    def __str__(self):
+        """
+        Give info about the cache contents
+        Returns:
+            str: total & per architecture sizes, most recently used architecture first
+        """
+        stats = self.stats()
+        budget = (
+            "unlimited" if stats["max_bytes"] is None else f"{stats['max_bytes']} B"
+        )
+        lines = [
+            f"Cache: {stats['total_bytes']} B in {stats['entries']} files (budget: {budget})",
+            f"Pinned outputs: {stats['pinned_bytes']} B in {stats['pinned_entries']} files "
+            "(never evicted, not counted towards the budget)",
+        ]
+        for arch, info in sorted(
+            stats["architectures"].items(),
+            key=lambda x: x[1]["last_access"],
+            reverse=True,
+        ):
+            last_used = time.strftime(
+                "%Y-%m-%d %H:%M:%S", time.localtime(info["last_access"])
+            )
+            kinds = ", ".join(
+                f"{kind}: {size} B" for kind, size in sorted(info["kinds"].items())
+            )
+            lines.append(f"{arch:>20} | last used {last_used} | {kinds}")
+        return "\n".join(lines)
+
+    def _evict(self, name: str) -> str:
+        """
+        Helper function: Remove a file from disk & from the cache index
+        Args:
+            name: file name of the cached file
+        Returns:
+            str: the evicted file name
+        """
+        try:
+            os.remove(os.path.join(self.data_dir, name))
+        except FileNotFoundError:
+            pass
+        del self.entries[name]
+        return name
+
+    def _load_index(self) -> None:
+        """
+        Helper function: Read the cache index (entries & stored budget) if it exists locally
+        Returns:
+            None
+        """
+        try:
+            with open(self.index_filepath, "r") as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            logger.warning("Cache index is corrupt, starting with an empty cache")
+            return
+        if not isinstance(index, dict):
+            logger.warning("Cache index is corrupt, starting with an empty cache")
+        elif index.get("version") == INDEX_VERSION:
+            self.entries = index["entries"]
+            self.max_bytes = index["max_bytes"]
+        else:
+            # index without a version only holds the entries
+            self.entries = index
+
+    def _save_index(self) -> None:
+        """
+        Helper function: Write the cache index atomically
+        Returns:
+            None
+        """
+        os.makedirs(self.data_dir, exist_ok=True)
+        tmp_filepath = self.index_filepath + ".tmp"
+        with open(tmp_filepath, "w") as f:
+            json.dump(
+                {
+                    "version": INDEX_VERSION,
+                    "max_bytes": self.max_bytes,
+                    "entries": self.entries,
+                },
+                f,
+            )
+        os.replace(tmp_filepath, self.index_filepath)
@@ -3,6 +3,9 @@
 import argparse
 import logging
 import sys
+from typing import List, Optional, Tuple
+
+from .decompressor import BACKEND_NAMES
 
 logger = logging.getLogger(__name__)
 
@@ -28,12 +31,215 @@ def validate_arch(arch: str) -> str:
     return arch.lower()
 
 
-def args_parser() -> argparse.Namespace:
+def validate_size(size: str) -> int:
+    """
+    Validate a size argument given in MB & convert it to bytes
+    Args:
+        size: size in MB from cmd line
+    Returns:
+        int: the size in bytes
+    """
+    if not size.isnumeric():
+        raise argparse.ArgumentTypeError(f"Invalid size '{size}', expected MB")
+    return int(size) * 1024 * 1024
+
+
+def validate_positive(value: str) -> int:
+    """
+    Validate an argument which must be a positive integer
+    Args:
+        value: the argument from cmd line
+    Returns:
+        int: the validated value
+    """
+    if not value.isnumeric() or int(value) < 1:
+        raise argparse.ArgumentTypeError(f"Invalid value '{value}', expected >= 1")
+    return int(value)
+
+
+def validate_shard(shard: str) -> Tuple[int, int]:
+    """
+    Validate a shard argument given as 'INDEX/COUNT' (index starting at 0)
+    Args:
+        shard: shard from cmd line
+    Returns:
+        tuple: index & count of the shard
+    """
+    index, _, count = shard.partition("/")
+    if not (index.isnumeric() and count.isnumeric() and int(index) < int(count)):
+        raise argparse.ArgumentTypeError(
+            f"Invalid shard '{shard}', expected INDEX/COUNT"
+        )
+    return int(index), int(count)
+
+
+def validate_byte_range(byte_range: str) -> Tuple[int, Optional[int]]:
+    """
+    Validate a byte range argument given as 'START:END' (END can be empty for till the end)
+    Args:
+        byte_range: byte range from cmd line
+    Returns:
+        tuple: start & end byte offsets
+    """
+    start, _, end = byte_range.partition(":")
+    if not (start.isnumeric() and (end.isnumeric() or not end)):
+        raise argparse.ArgumentTypeError(
+            f"Invalid byte range '{byte_range}', expected START:END"
+        )
+    return int(start), (int(end) if end else None)
+
+
+def add_cache_args(cmd_parser: argparse.ArgumentParser) -> None:
+    """
+    Add the cache related optional arguments to a parser
+    Args:
+        cmd_parser: parser to which the arguments are added
+    Returns:
+        None
+    """
+    cmd_parser.add_argument(
+        "--cache-size",
+        type=validate_size,
+        default=None,
+        help="Byte budget (in MB) for the files cache, kept for later runs, least recently used architectures are evicted first",
+    )
+    cmd_parser.add_argument(
+        "--compressed-only",
+        action="store_true",
+        help="Keep only the compressed (gzip) files in the cache",
+    )
+
+
+def subcommand_parser() -> argparse.ArgumentParser:
     """
-    Handle Command Line Arguments
+    Set up the parser for the subcommands (everything other than getting the package stats)
+    Returns:
+        argparse.ArgumentParser: the parser with a subparser per subcommand
+    """
+    cmd_parser = argparse.ArgumentParser(
+        description="Manage the Local Files of the Debian Packages Tool"
+    )
+    subparsers = cmd_parser.add_subparsers(dest="command", required=True)
+
+    cache_parser = subparsers.add_parser("cache", help="Inspect or prune the cache")
+    cache_parser.add_argument(
+        "action",
+        choices=["stats", "prune"],
+        help="'stats' to show the cache contents, 'prune' to evict files over the budget",
+    )
+    add_cache_args(cache_parser)
+    cache_parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Show Progress Status",
+    )
+
+    diff_parser = subparsers.add_parser(
+        "diff", help="Report packages changed between two fingerprint snapshots"
+    )
+    diff_parser.add_argument("old", type=str, help="Older fingerprint snapshot file")
+    diff_parser.add_argument("new", type=str, help="Newer fingerprint snapshot file")
+    diff_parser.add_argument(
+        "--show-files",
+        action="store_true",
+        help="Re-parse the local data of the newer snapshot for the files of added & changed packages",
+    )
+    diff_parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Show Progress Status",
+    )
+
+    bench_parser = subparsers.add_parser(
+        "bench", help="Benchmark the available decompression backends"
+    )
+    bench_parser.add_argument("archive", type=str, help="gzip archive to decompress")
+    bench_parser.add_argument(
+        "--repeat",
+        type=validate_positive,
+        default=3,
+        help="Number of runs per backend, the fastest run is reported",
+    )
+
+    map_parser = subparsers.add_parser(
+        "map", help="Parse a shard of the data into a mergeable partial result"
+    )
+    map_parser.add_argument(
+        "arch", type=validate_arch, help="Architecture of the data to parse"
+    )
+    map_parser.add_argument(
+        "--out", type=str, required=True, help="File to write the partial result to"
+    )
+    shard_group = map_parser.add_mutually_exclusive_group()
+    shard_group.add_argument(
+        "--shard",
+        type=validate_shard,
+        default=None,
+        help="Parse shard INDEX/COUNT (e.g. 0/4) of the data, needs the txt file",
+    )
+    shard_group.add_argument(
+        "--byte-range",
+        type=validate_byte_range,
+        default=None,
+        help="Parse the rows starting in START:END (bytes of the txt file), needs the txt file",
+    )
+    map_parser.add_argument(
+        "--file-name",
+        type=str,
+        default="data",
+        help="Base name of the data file, e.g. of an older snapshot",
+    )
+    map_parser.add_argument(
+        "--label",
+        type=str,
+        default=None,
+        help="Label of the results in the partial, default the architecture",
+    )
+    map_parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="Also compute per-package fingerprints",
+    )
+
+    reduce_parser = subparsers.add_parser(
+        "reduce", help="Merge partial results & output the final package stats"
+    )
+    reduce_parser.add_argument(
+        "partials", type=str, nargs="+", help="Partial result files to merge"
+    )
+    reduce_parser.add_argument(
+        "--out",
+        type=str,
+        default=None,
+        help="File to write the merged partial result to (for reducing further)",
+    )
+    reduce_parser.add_argument(
+        "--top-n",
+        type=int,
+        default=10,
+        help="No of top packages to output",
+    )
+    return cmd_parser
+
+
+SUBCOMMANDS = ("cache", "diff", "bench", "map", "reduce")
+
+
+def args_parser(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Handle Command Line Arguments, if the first argument is a subcommand it is parsed by the
+    subcommand parser instead
+    Args:
+        argv: arguments to parse, defaults to the arguments from cmd line
     Returns:
         args_object: parsed arguments namespace
     """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in SUBCOMMANDS:
+        return subcommand_parser().parse_args(argv)
+
     cmd_parser = argparse.ArgumentParser(
         description="Get Debian Packages for a Given Architecture"
     )
@@ -49,6 +255,36 @@ def args_parser() -> argparse.Namespace:
         action="store_true",
         help="Show Progress Status",
     )
-    args = cmd_parser.parse_args()
+    cmd_parser.add_argument(
+        "-c",
+        "--cached",
+        action="store_true",
+        help="Reuse the files & parse results in the cache instead of downloading & parsing again",
+    )
+    cmd_parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="Save a snapshot of per-package fingerprints for change detection (see 'diff')",
+    )
+    cmd_parser.add_argument(
+        "--export",
+        choices=("counts", "contents"),
+        default=None,
+        help="Export the package stats ('counts') or also the files of the packages ('contents') as .npy columns",
+    )
+    cmd_parser.add_argument(
+        "--aggregate",
+        action="store_true",
+        help="Also output combined stats across all given architectures & packages whose number of files differ",
+    )
+    cmd_parser.add_argument(
+        "--decompressor",
+        choices=("auto",) + BACKEND_NAMES,
+        default="auto",
+        help="Backend for decompressing the gzip files, default is the fastest available one",
+    )
+    add_cache_args(cmd_parser)
+    args = cmd_parser.parse_args(argv)
+    args.command = None
     args.arch = [validate_arch(arch) for arch in args.arch]
     return args
@@ -0,0 +1,262 @@
+"""Pluggable gzip Decompression Backends with Auto-Selection of the Fastest Available One"""
+
+import contextlib
+import functools
+import gzip
+import importlib
+import logging
+import shutil
+import signal
+import subprocess
+import time
+import zlib
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+from .exceptions import ParseError
+
+logger = logging.getLogger(__name__)
+
+# errors raised by gzip/zlib-like modules for truncated or corrupt data
+DECOMPRESSION_ERRORS = (EOFError, zlib.error, gzip.BadGzipFile)
+
+
+class Decompressor:
+    """Stdlib zlib backend, always available & the fallback for all others"""
+
+    name = "zlib"
+
+    def available(self) -> bool:
+        """
+        Check if the backend can be used on this host
+        Returns:
+            bool: if the backend is available
+        """
+        return True
+
+    def decompress(self, data: bytes) -> bytes:
+        """
+        Decompress a whole gzip buffer (all members)
+        Args:
+            data: the gzip data
+        Returns:
+            bytes: decompressed data
+        Raises:
+            ParseError: if the data is truncated or corrupt
+        """
+        chunks = []
+        try:
+            while data:
+                d = zlib.decompressobj(wbits=31)
+                chunks.append(d.decompress(data))
+                chunks.append(d.flush())
+                if not d.eof:
+                    raise ParseError("gzip data is truncated")
+                data = d.unused_data
+        except zlib.error as e:
+            raise ParseError(f"gzip data is corrupt: {e}") from e
+        return b"".join(chunks)
+
+    def decompress_file(
+        self, src_path: str, dst: BinaryIO, chunk_size: int = 1 << 20
+    ) -> None:
+        """
+        Decompress a gzip file in chunks, writing the result to an open binary file
+        Args:
+            src_path: path of the gzip file
+            dst: writable binary file object
+            chunk_size: size of the compressed chunks read at once
+        Returns:
+            None
+        Raises:
+            ParseError: if the gzip file is truncated or corrupt
+        """
+        with open(src_path, "rb") as f:
+            d = zlib.decompressobj(wbits=31)
+            # if the current gzip member still expects data
+            in_member = False
+            try:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        break
+                    while chunk:
+                        dst.write(d.decompress(chunk))
+                        in_member = True
+                        if not d.eof:
+                            break
+                        # start of the next gzip member
+                        dst.write(d.flush())
+                        chunk = d.unused_data
+                        d = zlib.decompressobj(wbits=31)
+                        in_member = False
+            except zlib.error as e:
+                raise ParseError(f"gzip file is corrupt: {src_path} {e}") from e
+            if in_member:
+                raise ParseError(f"gzip file is truncated: {src_path}")
+
+    @contextlib.contextmanager
+    def open(self, src_path: str) -> Iterator[BinaryIO]:
+        """
+        Open a gzip file for streaming reads of the decompressed data
+        Args:
+            src_path: path of the gzip file
+        Returns:
+            file_object: readable binary file object with the decompressed data
+        Raises:
+            ParseError: if the gzip file is truncated or corrupt (while reading)
+        """
+        with gzip.open(src_path, "rb") as f:
+            try:
+                yield f
+            except DECOMPRESSION_ERRORS as e:
+                raise ParseError(
+                    f"gzip file is truncated or corrupt: {src_path}"
+                ) from e
+
+
+class ModuleDecompressor(Decompressor):
+    """Backend for a python module with the interface of the stdlib gzip module (e.g. isal, zlib-ng)"""
+
+    def __init__(self, name: str, module: str):
+        self.name = name
+        self.module_name = module
+
+    @functools.cached_property
+    def module(self):
+        """
+        The imported backend module, None if it is not installed
+        Returns:
+            module: the gzip-like module
+        """
+        try:
+            return importlib.import_module(self.module_name)
+        except ImportError:
+            return None
+
+    def available(self) -> bool:
+        return self.module is not None
+
+    def decompress(self, data: bytes) -> bytes:
+        try:
+            return self.module.decompress(data)
+        except DECOMPRESSION_ERRORS as e:
+            raise ParseError(f"gzip data is truncated or corrupt: {e}") from e
+
+    def decompress_file(
+        self, src_path: str, dst: BinaryIO, chunk_size: int = 1 << 20
+    ) -> None:
+        with self.open(src_path) as f:
+            shutil.copyfileobj(f, dst, chunk_size)
+
+    @contextlib.contextmanager
+    def open(self, src_path: str) -> Iterator[BinaryIO]:
+        with self.module.open(src_path, "rb") as f:
+            try:
+                yield f
+            except DECOMPRESSION_ERRORS as e:
+                raise ParseError(
+                    f"gzip file is truncated or corrupt: {src_path}"
+                ) from e
+
+
+class ProcessDecompressor(Decompressor):
+    """Backend for an external gzip compatible executable (e.g. pigz, igzip) feeding a pipe"""
+
+    def __init__(self, name: str, executable: str):
+        self.name = name
+        self.executable = executable
+
+    def available(self) -> bool:
+        return shutil.which(self.executable) is not None
+
+    def decompress(self, data: bytes) -> bytes:
+        result = subprocess.run(
+            [self.executable, "-dc"], input=data, stdout=subprocess.PIPE
+        )
+        if result.returncode:
+            raise ParseError(
+                f"{self.executable} exited with code {result.returncode}, "
+                "gzip data is truncated or corrupt"
+            )
+        return result.stdout
+
+    def decompress_file(
+        self, src_path: str, dst: BinaryIO, chunk_size: int = 1 << 20
+    ) -> None:
+        with self.open(src_path) as stream:
+            shutil.copyfileobj(stream, dst, chunk_size)
+
+    @contextlib.contextmanager
+    def open(self, src_path: str) -> Iterator[BinaryIO]:
+        with open(src_path, "rb") as f, subprocess.Popen(
+            [self.executable, "-dc"], stdin=f, stdout=subprocess.PIPE
+        ) as process:
+            yield process.stdout
+        # closing the pipe early (reader stopped) terminates the process, hence not an error
+        if process.returncode not in (0, -signal.SIGPIPE):
+            raise ParseError(
+                f"{self.executable} exited with code {process.returncode}, "
+                f"gzip file is truncated or corrupt: {src_path}"
+            )
+
+
+# in order of preference - fastest first
+BACKENDS = (
+    ModuleDecompressor("isal", "isal.igzip"),
+    ModuleDecompressor("zlib-ng", "zlib_ng.gzip_ng"),
+    ProcessDecompressor("igzip", "igzip"),
+    ProcessDecompressor("pigz", "pigz"),
+    Decompressor(),
+)
+BACKEND_NAMES = tuple(backend.name for backend in BACKENDS)
+
+
+@functools.lru_cache(maxsize=None)
+def available_backends() -> Tuple[Decompressor, ...]:
+    """
+    Probe (once) which backends can be used on this host
+    Returns:
+        tuple: the available backends, fastest first
+    """
+    return tuple(backend for backend in BACKENDS if backend.available())
+
+
+def get_decompressor(name: Optional[str] = None) -> Decompressor:
+    """
+    Get a decompression backend by name or the fastest available one,
+    falls back to stdlib zlib if the requested one is not available
+    Args:
+        name: name of the backend, None or "auto" for auto-selection
+    Returns:
+        Decompressor: the selected backend
+    """
+    backends = available_backends()
+    if name in (None, "auto"):
+        return backends[0]
+    for backend in backends:
+        if backend.name == name:
+            return backend
+    logger.warning(f"Decompressor '{name}' not available, using '{backends[-1].name}'")
+    return backends[-1]
+
+
+def benchmark(archive_path: str, repeat: int = 3) -> List[Tuple[str, float]]:
+    """
+    Micro-benchmark the available backends on a gzip archive
+    Args:
+        archive_path: path of the gzip archive
+        repeat: number of runs per backend, the fastest run counts
+    Returns:
+        list: backend names & their throughput in MB/s of decompressed data, fastest first
+    """
+    with open(archive_path, "rb") as f:
+        data = f.read()
+    results = []
+    for backend in available_backends():
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            size = len(backend.decompress(data))
+            best = min(best, time.perf_counter() - start)
+        results.append((backend.name, size / (1024 * 1024) / max(best, 1e-9)))
+    return sorted(results, key=lambda x: x[1], reverse=True)
@@ -1,10 +1,8 @@
 """Downloader for Downloading & Saving the data as gzip & text"""
 
-import gzip
 import logging
 import os
-import sys
-from typing import Tuple
+from typing import Optional, Tuple
 from urllib import parse
 
 import bs4
@@ -12,8 +10,14 @@ import requests
 from bs4 import BeautifulSoup
 from tqdm import tqdm
 
+from .cache import CacheStore
+from .decompressor import Decompressor, get_decompressor
+from .exceptions import ArchitectureNotFoundError, DownloadError, StorageError
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_BASE_URL = "http://ftp.uk.debian.org/debian/dists/stable/main/"
+
 
 class Downloader:
     def __init__(
@@ -23,6 +27,8 @@ class Downloader:
         verbose: bool,
         file_name: str = "data",
         arch_file_name: str = "arch_names",
+        cache: Optional[CacheStore] = None,
+        decompressor: Optional[Decompressor] = None,
     ):
         self.data_dir = os.path.join(os.getcwd(), "files")
         self.architecture = architecture
@@ -40,6 +46,8 @@ class Downloader:
         self.arch_filepath = os.path.join(os.getcwd(), arch_file_name + ".txt")
         self.fetch_attempts = 0
         self.max_fetch_attempts = 1
+        self.cache = cache
+        self.decompressor = decompressor or get_decompressor()
 
     def initiate(self) -> None:
         """
@@ -73,6 +81,8 @@ class Downloader:
         Extract URL for the given architecture from all URLs
         Returns:
             str: download url specific to the architecture
+        Raises:
+            ArchitectureNotFoundError: if the architecture is not found even after updating
         """
         if self.architecture in self.arch_names:
             if self.verbosity:
@@ -90,24 +100,29 @@ class Downloader:
                     logging.info(f"Updating data from {self.base_url}...")
                 self.fetch_attempts += 1
                 self.get_content_urls()
-            print(
-                f"Nothing found for '{self.architecture}' architecture after update, exiting..."
+            if self.architecture_url is not None:
+                return self.architecture_url
+            raise ArchitectureNotFoundError(
+                f"Nothing found for '{self.architecture}' architecture after update"
             )
-            sys.exit()
 
     def save_gzip(self, chunk_size: int = 1024) -> None:
         """
-        Save data as a gzip file
+        Save data as a gzip file, written to a temporary file first and then renamed
+        so readers never see a partially downloaded file
         Args:
             chunk_size: the packet size for streaming from extracted URL
         Returns:
             None
+        Raises:
+            StorageError: if the gzip file cannot be written
         """
         if self.verbosity:
             logger.info("Downloading contents from URL & saving as gzip...")
         r, _ = Downloader.request_soup(self.architecture_url)
+        part_filepath = self.gzip_filepath + ".part"
         try:
-            with open(self.gzip_filepath, "wb") as f:
+            with open(part_filepath, "wb") as f:
                 with tqdm(
                     unit="B",
                     unit_scale=True,
@@ -121,27 +136,53 @@ class Downloader:
                     for chunk in r.iter_content(chunk_size=chunk_size):
                         f.write(chunk)
                         progress_bar.update(len(chunk))
+            os.replace(part_filepath, self.gzip_filepath)
         except IOError as e:
-            logger.error(f"Error while writing gzip file: {e}")
-            sys.exit()
+            raise StorageError(f"Error while writing gzip file: {e}") from e
+        finally:
+            # never leave a partially downloaded gzip file behind
+            if os.path.exists(part_filepath):
+                os.remove(part_filepath)
+        if self.cache is not None:
+            self.cache.register(self.gzip_filepath, self.architecture, "archive")
 
     def save_txt(self) -> None:
         """
-        Save data from gzip in a text file
+        Save data from gzip in a text file, skipped if the cache keeps only compressed forms
+        (an existing txt file is removed then, it may be stale after a new download)
         Returns:
             None
+        Raises:
+            StorageError: if the gzip file is missing or the txt file cannot be written
+            ParseError: if the gzip file is truncated or corrupt
         """
+        if self.cache is not None and self.cache.compressed_only:
+            if self.verbosity:
+                logger.info("Keeping only the gzip file, txt file not saved")
+            # readers prefer the txt file, so an old one would shadow the new gzip file
+            if os.path.exists(self.txt_filepath):
+                os.remove(self.txt_filepath)
+            return
         if self.verbosity:
-            logger.info("Saving as txt file for further processing...")
+            logger.info(
+                f"Saving as txt file for further processing ({self.decompressor.name})..."
+            )
+        if not os.path.exists(self.gzip_filepath):
+            raise StorageError("gzip file not found for writing a txt file")
+        part_filepath = self.txt_filepath + ".part"
         try:
-            with open(self.gzip_filepath, "rb") as fr_gzip, open(
-                self.txt_filepath, "wb"
-            ) as fr_txt:
-                data = gzip.decompress(fr_gzip.read())
-                fr_txt.write(data)
-        except FileNotFoundError:
-            logger.error("gzip file not found for writing a txt file")
-            sys.exit()
+            with open(part_filepath, "wb") as fr_txt:
+                self.decompressor.decompress_file(self.gzip_filepath, fr_txt)
+            os.replace(part_filepath, self.txt_filepath)
+        except IOError as e:
+            raise StorageError(f"Error while writing txt file: {e}") from e
+        finally:
+            # never leave a partially decompressed txt file behind
+            if os.path.exists(part_filepath):
+                os.remove(part_filepath)
+        if self.cache is not None:
+            self.cache.touch(self.gzip_filepath)
+            self.cache.register(self.txt_filepath, self.architecture, "index")
 
     def _read_arch_names(self) -> None:
         """
@@ -166,8 +207,7 @@ class Downloader:
                 for name in self.arch_names:
                     f.write(name + "\n")
         except IOError as e:
-            logger.error(f"Error while writing arch_names txt file: {e}")
-            sys.exit()
+            raise StorageError(f"Error while writing arch_names txt file: {e}") from e
         else:
             self.extract_arch_url()
 
@@ -209,19 +249,18 @@ class Downloader:
         Returns:
             r: response object from the request
             soup_object: the parsed content from the response
+        Raises:
+            DownloadError: if the request fails
         """
         try:
             r = requests.get(url)
             r.raise_for_status()
         except requests.exceptions.HTTPError as e:
-            logger.error(f"HTTP Error: {url} {e}")
-            sys.exit()
+            raise DownloadError(f"HTTP Error: {url} {e}") from e
         except requests.exceptions.ConnectionError as e:
-            logger.error(f"Cannot Connect: {url} {e}")
-            sys.exit()
+            raise DownloadError(f"Cannot Connect: {url} {e}") from e
         except requests.exceptions.RequestException as e:
-            logger.error(f"Problem encountered: {url} {e}")
-            sys.exit()
+            raise DownloadError(f"Problem encountered: {url} {e}") from e
         else:
             return r, BeautifulSoup(r.text, "html.parser")
 
@@ -0,0 +1,21 @@
+"""Exceptions Raised by the Downloader, Parser & Other Modules instead of Exiting"""
+
+
+class CanonicalError(Exception):
+    """Base class for all errors of the tool"""
+
+
+class DownloadError(CanonicalError):
+    """Request to the Debian mirror failed (HTTP, connection or other request error)"""
+
+
+class ArchitectureNotFoundError(CanonicalError):
+    """No Contents-index exists for the architecture, even after updating the architecture names"""
+
+
+class StorageError(CanonicalError):
+    """Reading or writing a local file failed"""
+
+
+class ParseError(CanonicalError):
+    """Data could not be parsed"""
@@ -0,0 +1,222 @@
+"""Columnar Export of Package Stats & Contents-Index as NumPy .npy Files (Memory-Mappable)"""
+
+import ast
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+from .exceptions import ParseError, StorageError
+
+logger = logging.getLogger(__name__)
+
+NPY_MAGIC = b"\x93NUMPY"
+# header is reserved with a fixed size so the final shape can be written after the last batch
+NPY_HEADER_SIZE = 128
+NPY_DTYPES = {"B": "|u1", "I": "<u4", "Q": "<u8"}
+COUNT_COLUMNS = ("package_names", "package_name_offsets", "file_counts")
+CONTENTS_COLUMNS = ("paths", "path_offsets", "package_path_offsets")
+
+
+class NpyColumnWriter:
+    """Writes a 1-d .npy file in batches, the shape in the header is set on close"""
+
+    def __init__(self, filepath: str, typecode: str):
+        self.filepath = filepath
+        self.typecode = typecode
+        self.length = 0
+        try:
+            self.file = open(filepath, "wb")
+            self.file.write(self._header())
+        except IOError as e:
+            raise StorageError(f"Error while writing column {filepath}: {e}") from e
+
+    def write(self, values: Iterable[int]) -> None:
+        """
+        Append a batch of values
+        Args:
+            values: the values, an array of the same typecode is written as is
+        Returns:
+            None
+        Raises:
+            StorageError: if the file cannot be written
+        """
+        if not (isinstance(values, array) and values.typecode == self.typecode):
+            values = array(self.typecode, values)
+        if sys.byteorder != "little":
+            # swap a copy, the batch of the caller stays untouched
+            values = array(self.typecode, values)
+            values.byteswap()
+        try:
+            self.file.write(values.tobytes())
+        except IOError as e:
+            raise StorageError(
+                f"Error while writing column {self.filepath}: {e}"
+            ) from e
+        self.length += len(values)
+
+    def close(self) -> None:
+        """
+        Write the final shape to the header & close the file
+        Returns:
+            None
+        Raises:
+            StorageError: if the file cannot be written
+        """
+        try:
+            with self.file:
+                self.file.seek(0)
+                self.file.write(self._header())
+        except IOError as e:
+            raise StorageError(
+                f"Error while writing column {self.filepath}: {e}"
+            ) from e
+
+    def _header(self) -> bytes:
+        """
+        Helper function: Build the .npy (version 1.0) header for the current length
+        Returns:
+            bytes: header padded to NPY_HEADER_SIZE
+        """
+        header = "{{'descr': '{}', 'fortran_order': False, 'shape': ({},), }}".format(
+            NPY_DTYPES[self.typecode], self.length
+        )
+        padding = NPY_HEADER_SIZE - len(NPY_MAGIC) - 4 - len(header) - 1
+        header = (header + " " * padding + "\n").encode("latin1")
+        return NPY_MAGIC + b"\x01\x00" + struct.pack("<H", len(header)) + header
+
+
+class ColumnarExporter:
+    """
+    Exports package stats (& optionally the contents-index) as columns in batches:
+        package_names & package_name_offsets - name i is package_names[offsets[i]:offsets[i + 1]]
+        file_counts - no of files of package i
+        paths & path_offsets - same as the package names for the file paths
+        package_path_offsets - files of package i are the paths offsets[i] to offsets[i + 1]
+    """
+
+    def __init__(self, prefix: str, contents: bool = False):
+        self.prefix = prefix
+        self.contents = contents
+        self.writers = {}
+        columns = list(zip(COUNT_COLUMNS, ("B", "Q", "I")))
+        if contents:
+            columns += list(zip(CONTENTS_COLUMNS, ("B", "Q", "Q")))
+        try:
+            for column, typecode in columns:
+                self.writers[column] = NpyColumnWriter(self.filepath(column), typecode)
+        except StorageError:
+            # don't leak the files opened before the failing one
+            for writer in self.writers.values():
+                writer.file.close()
+            raise
+        self.name_offset = 0
+        self.path_offset = 0
+        self.path_count = 0
+        self.writers["package_name_offsets"].write([0])
+        if contents:
+            self.writers["path_offsets"].write([0])
+            self.writers["package_path_offsets"].write([0])
+
+    def filepath(self, column: str) -> str:
+        """
+        Path of the .npy file of a column
+        Args:
+            column: name of the column
+        Returns:
+            str: path of the file
+        """
+        return f"{self.prefix}_{column}.npy"
+
+    def write_batch(self, rows: Iterable[Tuple[str, int, Optional[List[str]]]]) -> None:
+        """
+        Append a batch of packages
+        Args:
+            rows: (package, number of files, files or None) per package
+        Returns:
+            None
+        """
+        names, name_offsets, counts = bytearray(), array("Q"), array("I")
+        paths, path_offsets, package_path_offsets = bytearray(), array("Q"), array("Q")
+        for package, count, file_s in rows:
+            name = package.encode("utf-8")
+            names += name
+            self.name_offset += len(name)
+            name_offsets.append(self.name_offset)
+            counts.append(count)
+            if self.contents:
+                for file in file_s or ():
+                    path = file.encode("utf-8")
+                    paths += path
+                    self.path_offset += len(path)
+                    path_offsets.append(self.path_offset)
+                self.path_count += len(file_s or ())
+                package_path_offsets.append(self.path_count)
+
+        self.writers["package_names"].write(array("B", names))
+        self.writers["package_name_offsets"].write(name_offsets)
+        self.writers["file_counts"].write(counts)
+        if self.contents:
+            self.writers["paths"].write(array("B", paths))
+            self.writers["path_offsets"].write(path_offsets)
+            self.writers["package_path_offsets"].write(package_path_offsets)
+
+    def close(self) -> List[str]:
+        """
+        Finish all columns
+        Returns:
+            list: paths of the written files
+        """
+        for writer in self.writers.values():
+            writer.close()
+        return [writer.filepath for writer in self.writers.values()]
+
+
+def read_npy(filepath: str) -> memoryview:
+    """
+    Memory-map a 1-d .npy file written by NpyColumnWriter without reading its data
+    (numpy users can use numpy.load(filepath, mmap_mode="r") instead)
+    Args:
+        filepath: path of the .npy file
+    Returns:
+        memoryview: the values, backed by the mapped file
+    Raises:
+        StorageError: if the file does not exist
+        ParseError: if the file is not a supported .npy file
+    """
+    try:
+        with open(filepath, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError) as e:
+        raise StorageError(f"Column not found or empty: {filepath}") from e
+
+    if mapped[: len(NPY_MAGIC)] != NPY_MAGIC or mapped[6] != 1:
+        raise ParseError(f"Not a .npy (version 1) file: {filepath}")
+    (header_len,) = struct.unpack_from("<H", mapped, 8)
+    header = ast.literal_eval(mapped[10 : 10 + header_len].decode("latin1"))
+    typecodes = {dtype: typecode for typecode, dtype in NPY_DTYPES.items()}
+    if header["descr"] not in typecodes or len(header["shape"]) != 1:
+        raise ParseError(f"Unsupported column {header}: {filepath}")
+    typecode = typecodes[header["descr"]]
+    start = 10 + header_len
+    end = start + header["shape"][0] * array(typecode).itemsize
+    return memoryview(mapped)[start:end].cast(typecode)
+
+
+def load_columns(prefix: str) -> dict:
+    """
+    Memory-map all columns written by ColumnarExporter
+    Args:
+        prefix: prefix of the column files
+    Returns:
+        dict: column names as keys and their memory-mapped values as values
+    """
+    columns = {}
+    for column in COUNT_COLUMNS + CONTENTS_COLUMNS:
+        filepath = f"{prefix}_{column}.npy"
+        if column in COUNT_COLUMNS or os.path.exists(filepath):
+            columns[column] = read_npy(filepath)
+    return columns
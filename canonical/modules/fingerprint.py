@@ -0,0 +1,140 @@
+"""Per-Package Content Fingerprints, Compact Snapshots & Snapshot Diffs"""
+
+import hashlib
+import logging
+import struct
+from typing import Iterable, Tuple
+
+from .exceptions import ParseError, StorageError
+
+logger = logging.getLogger(__name__)
+
+MASK_64 = (1 << 64) - 1
+SNAPSHOT_MAGIC = b"CFPS"
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct("<4sBH")
+_COUNT = struct.Struct("<I")
+_RECORD = struct.Struct("<IQ")
+_NAME_LEN = struct.Struct("<H")
+
+
+def path_hash(path: str) -> int:
+    """
+    64-bit hash of a single file path
+    Args:
+        path: the file path
+    Returns:
+        int: unsigned 64-bit hash
+    """
+    return int.from_bytes(
+        hashlib.blake2b(path.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+def files_fingerprint(file_s: Iterable[str]) -> int:
+    """
+    Order-independent fingerprint of a set of files - the sum (mod 2^64) of their hashes,
+    so fingerprints of parts of a package can be combined by adding them
+    Args:
+        file_s: the file paths
+    Returns:
+        int: unsigned 64-bit fingerprint
+    """
+    return sum(path_hash(path) for path in file_s) & MASK_64
+
+
+def write_snapshot(
+    filepath: str, architecture: str, counts: dict, fingerprints: dict
+) -> None:
+    """
+    Write package counts & fingerprints as a compact binary snapshot
+    Args:
+        filepath: path of the snapshot file
+        architecture: the architecture the snapshot belongs to
+        counts: packages as keys and the number of files in them as values
+        fingerprints: packages as keys and their fingerprints as values
+    Returns:
+        None
+    Raises:
+        StorageError: if the snapshot cannot be written
+    """
+    arch_bytes = architecture.encode("utf-8")
+    try:
+        with open(filepath, "wb") as f:
+            f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(arch_bytes)))
+            f.write(arch_bytes)
+            f.write(_COUNT.pack(len(counts)))
+            for package, count in counts.items():
+                name = package.encode("utf-8")
+                f.write(_NAME_LEN.pack(len(name)))
+                f.write(name)
+                f.write(_RECORD.pack(count, fingerprints.get(package, 0)))
+    except IOError as e:
+        raise StorageError(f"Error while writing fingerprint snapshot: {e}") from e
+
+
+def read_snapshot(filepath: str) -> Tuple[str, dict]:
+    """
+    Read a snapshot written by write_snapshot
+    Args:
+        filepath: path of the snapshot file
+    Returns:
+        str: the architecture of the snapshot
+        dict: packages as keys and (number of files, fingerprint) as values
+    Raises:
+        StorageError: if the snapshot does not exist
+        ParseError: if the file is not a snapshot or is truncated/corrupt
+    """
+    try:
+        with open(filepath, "rb") as f:
+            data = f.read()
+    except FileNotFoundError as e:
+        raise StorageError(f"Fingerprint snapshot not found: {filepath}") from e
+
+    if len(data) < _HEADER.size:
+        raise ParseError(f"Not a fingerprint snapshot: {filepath}")
+    magic, version, arch_len = _HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ParseError(f"Not a fingerprint snapshot: {filepath}")
+    offset = _HEADER.size
+    try:
+        architecture = data[offset : offset + arch_len].decode("utf-8")
+        offset += arch_len
+        (n_packages,) = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+
+        packages = {}
+        for _ in range(n_packages):
+            (name_len,) = _NAME_LEN.unpack_from(data, offset)
+            offset += _NAME_LEN.size
+            name = data[offset : offset + name_len].decode("utf-8")
+            offset += name_len
+            packages[name] = _RECORD.unpack_from(data, offset)
+            offset += _RECORD.size
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ParseError(
+            f"Truncated or corrupt fingerprint snapshot: {filepath}"
+        ) from e
+    if offset != len(data):
+        raise ParseError(f"Trailing data in fingerprint snapshot: {filepath}")
+    return architecture, packages
+
+
+def diff_snapshots(old: dict, new: dict) -> dict:
+    """
+    Compare two snapshots package by package
+    Args:
+        old: packages of the older snapshot, as returned by read_snapshot
+        new: packages of the newer snapshot, as returned by read_snapshot
+    Returns:
+        dict: sorted lists of the "added", "removed" and "changed" packages
+    """
+    return {
+        "added": sorted(package for package in new if package not in old),
+        "removed": sorted(package for package in old if package not in new),
+        "changed": sorted(
+            package
+            for package, record in new.items()
+            if package in old and old[package] != record
+        ),
+    }
@@ -1,11 +1,21 @@
 """Parser for Parsing & Processing the Downloaded Data & Obtaining Package Stats"""
 
+import gzip
+import json
 import logging
 import os
 import re
-import sys
+import time
 from collections import defaultdict
-from typing import Tuple, Union
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+from .aggregate import StringTable
+from .cache import CacheStore
+from .decompressor import Decompressor, get_decompressor
+from .exceptions import ParseError, StorageError
+from .export import ColumnarExporter
+from .fingerprint import MASK_64, files_fingerprint, write_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +28,11 @@ class Parser:
         regex_parse: bool,
         get_contents: bool,
         file_name: str = "data",
+        cache: Optional[CacheStore] = None,
+        fingerprint: bool = False,
+        decompressor: Optional[Decompressor] = None,
+        string_table: Optional[StringTable] = None,
+        path_table: Optional[StringTable] = None,
     ):
         self.data_dir = os.path.join(os.getcwd(), "files")
         self.architecture = architecture
@@ -25,30 +40,138 @@ class Parser:
         self.txt_filename = os.path.join(
             self.data_dir, (file_name + f"_{self.architecture}" + ".txt")
         )
+        self.gzip_filename = os.path.join(
+            self.data_dir, (file_name + f"_{self.architecture}" + ".gz")
+        )
+        self.cache = cache
+        self.decompressor = decompressor or get_decompressor()
         self.file_data = None
         self.package_file_dict_len = defaultdict(int)
         self.package_file_dict = defaultdict(list)
+        self.package_fingerprint = defaultdict(int)
+        self.anomalies = defaultdict(int)
+        self.fingerprint = fingerprint
         self.package_file_dict_sorted = None
         self.package_file_dict_len_sorted = None
         self.get_contents = get_contents
         self.regex_parse = regex_parse
+        self.string_table = string_table
+        self.path_table = path_table
         self.regex = re.compile(r"(\s|,)[a-z-]+\d*\/.[^\s]*(\n|,)")
 
     def read_txt(self) -> bytes:
         """
-        Read data from saved text file
+        Read data from saved text file, falls back to the saved gzip file
+        if the text file does not exist (e.g. evicted from the cache)
         Returns:
             bytes_object: downloaded data in bytes
+        Raises:
+            StorageError: if neither the txt nor the gzip file exists
         """
         try:
             with open(self.txt_filename, "rb") as f:
                 self.file_data = f.read()
         except FileNotFoundError:
-            logger.error("No txt file found to read from")
-            sys.exit()
+            try:
+                with open(self.gzip_filename, "rb") as f:
+                    if self.verbosity:
+                        logging.info("No txt file found, reading from gzip file...")
+                    self.file_data = self.decompressor.decompress(f.read())
+            except FileNotFoundError as e:
+                raise StorageError("No txt or gzip file found to read from") from e
+            if self.cache is not None:
+                self.cache.touch(self.gzip_filename)
+            return self.file_data
         else:
+            if self.cache is not None:
+                self.cache.touch(self.txt_filename)
+                self.cache.touch(self.gzip_filename)
             return self.file_data
 
+    def iter_lines(self, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+        """
+        Stream the non-empty rows of the saved text file (or the gzip file if the text file
+        does not exist) without reading the whole file into memory
+        Args:
+            start: only rows starting at or after this byte offset, needs the txt file
+            (seeking in the gzip file would decompress everything before the offset)
+            end: only rows starting before this byte offset, default till the end
+        Returns:
+            iterator: rows of the data as strings
+        Raises:
+            StorageError: if neither the txt nor the gzip file exists, or if a start offset
+            is given & only the gzip file exists
+        """
+        if os.path.exists(self.txt_filename):
+            if self.cache is not None:
+                self.cache.touch(self.txt_filename)
+            stream = open(self.txt_filename, "rb")
+        elif os.path.exists(self.gzip_filename):
+            if start:
+                raise StorageError(
+                    "txt file needed for reading from a byte offset, only gzip file found"
+                )
+            if self.cache is not None:
+                self.cache.touch(self.gzip_filename)
+            stream = self.decompressor.open(self.gzip_filename)
+        else:
+            raise StorageError("No txt or gzip file found to read from")
+        with stream as f:
+            position = 0
+            if start:
+                # jump to the first row starting at or after 'start'
+                f.seek(start - 1)
+                if f.read(1) != b"\n":
+                    f.readline()
+                position = f.tell()
+            for line in f:
+                if end is not None and position >= end:
+                    break
+                line_start, position = position, position + len(line)
+                if line_start < start:
+                    continue
+                line = Parser.convert_to_str(line).strip()
+                if line:
+                    yield line
+
+    def parse_stream(self, data: Optional[Iterable[str]] = None) -> None:
+        """
+        Parse and Process the data row by row (streaming), same as parse_txt
+        but without holding the raw data in memory
+        Args:
+            data: rows to process, default all rows from iter_lines
+        Returns:
+            None
+        """
+        self._process_contents(data=self.iter_lines() if data is None else data)
+
+    def parse_row(self, value: str) -> Tuple[list | str, list | str]:
+        """
+        Parse a single row with the parser (split or regex) of this object
+        Args:
+            value: the row (raw data string) containing the file(s) and package(s)
+        Returns:
+            tuple: the package(s) and file(s) as a list
+        """
+        if self.regex_parse:
+            return self._regex_parser(value)
+        return Parser._split_parser(value)
+
+    def top_packages(self, top_n: int = 10) -> list:
+        """
+        Get the top-n packages & the no of files without any output
+        Args:
+            top_n: no of top packages required, None for all packages
+        Returns:
+            list: reverse-sorted (desc) top-n packages & the no of files contained in them
+        """
+        if not self.package_file_dict_len:
+            self.parse_txt()
+        self.package_file_dict_len_sorted = Parser.sort_dict_len(
+            self.package_file_dict_len, desc=True
+        )
+        return self.package_file_dict_len_sorted[:top_n]
+
     def parse_txt(self) -> None:
         """
         Parse and Process raw data to get packages & corresponding files and their count
@@ -78,7 +201,9 @@ class Parser:
             write_to_file: if results are to be written to a txt file
             filename: if yes above, the filename else default base name of "package_stats" is used
         Returns:
-            list: reverse-sorted (desc) top-n packages & the no of files contained in them
+            list: reverse-sorted (desc) packages & the no of files contained in them
+        Raises:
+            StorageError: if the results txt file cannot be written
         """
         if not self.package_file_dict_len:
             self.parse_txt()
@@ -94,27 +219,181 @@ class Parser:
             file_path = os.path.join(
                 self.data_dir, (filename + f"_{self.architecture}" + ".txt")
             )
+            header_string, package_files_rows = Parser.format_stats(
+                self.architecture, self.package_file_dict_len_sorted[:top_n]
+            )
             try:
                 with open(file_path, "w") as f:
-                    header_string = "FOR ARCHITECTURE '{}':\n{:^40} {:>45}".format(
-                        self.architecture, "PACKAGE NAME", "NUMBER OF FILES"
-                    )
                     print(header_string)
                     f.write(header_string + "\n")
-                    for ind, val in enumerate(
-                        self.package_file_dict_len_sorted[:top_n]
-                    ):
-                        package_files_row = "{:>5}. {:-<70} {}".format(
-                            (ind + 1), val[0], val[1]
-                        )
+                    for package_files_row in package_files_rows:
                         print(package_files_row)
                         if write_to_file:
                             f.write(package_files_row + "\n")
             except IOError as e:
-                logger.error(f"Error while writing results txt file: {e}")
-                sys.exit()
-            else:
-                return self.package_file_dict_len_sorted
+                raise StorageError(f"Error while writing results txt file: {e}") from e
+            if self.cache is not None:
+                self.cache.register(file_path, self.architecture, "stats")
+        return self.package_file_dict_len_sorted
+
+    def save_counts(self, filename: str = "counts") -> str:
+        """
+        Cache the parse result (the no of files per package & the anomaly tallies) as gzip
+        compressed JSON, so later runs with cached files can skip parsing
+        Args:
+            filename: base name of the parse result file, default "counts"
+        Returns:
+            str: path of the written file
+        Raises:
+            StorageError: if the file cannot be written
+        """
+        file_path = os.path.join(
+            self.data_dir, (filename + f"_{self.architecture}" + ".json.gz")
+        )
+        try:
+            with gzip.open(file_path, "wt", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "architecture": self.architecture,
+                        "counts": self.package_file_dict_len,
+                        "anomalies": self.anomalies,
+                    },
+                    f,
+                )
+        except IOError as e:
+            raise StorageError(f"Error while writing parse result: {e}") from e
+        if self.cache is not None:
+            self.cache.register(file_path, self.architecture, "counts")
+        return file_path
+
+    def load_counts(self, filename: str = "counts") -> bool:
+        """
+        Load the parse result cached by save_counts, unless it is older than the saved
+        gzip file (the data was downloaded again since)
+        Args:
+            filename: base name of the parse result file, default "counts"
+        Returns:
+            bool: if a valid parse result was loaded
+        """
+        file_path = os.path.join(
+            self.data_dir, (filename + f"_{self.architecture}" + ".json.gz")
+        )
+        try:
+            if os.path.getmtime(file_path) < os.path.getmtime(self.gzip_filename):
+                return False
+            with gzip.open(file_path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError):
+            data = None
+        if not isinstance(data, dict) or data.get("architecture") != self.architecture:
+            logger.warning(f"Parse result is corrupt, parsing again: {file_path}")
+            return False
+        if self.verbosity:
+            logging.info(f"Reusing the cached parse result {file_path}...")
+        self.package_file_dict_len.update(data["counts"])
+        self.anomalies.update(data["anomalies"])
+        if self.cache is not None:
+            self.cache.touch(file_path)
+        return True
+
+    def write_fingerprints(
+        self, filename: str = "fingerprints", date: Optional[str] = None
+    ) -> str:
+        """
+        Persist the package counts & fingerprints as a compact snapshot for change detection
+        Args:
+            filename: base name of the snapshot file, default "fingerprints"
+            date: date of the snapshot (YYYYMMDD) in the file name, default today
+        Returns:
+            str: path of the written snapshot
+        Raises:
+            ParseError: if the parser does not compute fingerprints
+        """
+        if not self.fingerprint:
+            raise ParseError(
+                "Fingerprints are not computed by this parser, create it with fingerprint=True"
+            )
+        if not self.package_file_dict_len:
+            self.parse_stream()
+        date = time.strftime("%Y%m%d") if date is None else date
+        file_path = os.path.join(
+            self.data_dir, (filename + f"_{self.architecture}_{date}" + ".bin")
+        )
+        if self.verbosity:
+            logging.info(f"Writing fingerprint snapshot to {file_path}...")
+        write_snapshot(
+            file_path,
+            self.architecture,
+            self.package_file_dict_len,
+            self.package_fingerprint,
+        )
+        if self.cache is not None:
+            self.cache.register(file_path, self.architecture, "fingerprint")
+        return file_path
+
+    def export_columns(
+        self, filename: str = "columns", batch_size: int = 10000
+    ) -> list:
+        """
+        Export the package stats (& the files of the packages if contents are parsed) as
+        memory-mappable .npy columns, packages in descending order of their no of files,
+        the data is streamed if not parsed yet (the counts are final only after the last row)
+        Args:
+            filename: base name of the column files, default "columns"
+            batch_size: no of packages buffered per write to the columns
+        Returns:
+            list: paths of the written files
+        """
+        if not self.package_file_dict_len:
+            self.parse_stream()
+        prefix = os.path.join(self.data_dir, (filename + f"_{self.architecture}"))
+        if self.verbosity:
+            logging.info(f"Exporting columns to {prefix}_*.npy...")
+        exporter = ColumnarExporter(prefix, contents=self.get_contents)
+        packages = iter(Parser.sort_dict_len(self.package_file_dict_len, desc=True))
+        while True:
+            batch = list(islice(packages, batch_size))
+            if not batch:
+                break
+            exporter.write_batch(
+                (
+                    package,
+                    count,
+                    self.package_file_dict.get(package) if self.get_contents else None,
+                )
+                for package, count in batch
+            )
+        file_paths = exporter.close()
+        if self.cache is not None:
+            for file_path in file_paths:
+                self.cache.register(file_path, self.architecture, "export")
+        return file_paths
+
+    def contents_for(self, packages: Iterable[str]) -> dict:
+        """
+        Re-parse the data (streamed row by row) collecting the files only for the given
+        packages (e.g. the ones that changed between two snapshots)
+        Args:
+            packages: names of the packages whose files are required
+        Returns:
+            dict: packages as keys and the files in them as values
+        """
+        wanted = set(packages)
+        contents = defaultdict(list)
+        for val in self.iter_lines():
+            packs, file_s = self.parse_row(val)
+            if not file_s or not packs:
+                continue
+            if len(file_s) == 1 and file_s[0].upper() == "EMPTY_PACKAGE":
+                if packs[0] in wanted:
+                    contents[packs[0]] = []
+                continue
+            for pack in packs:
+                if pack in wanted:
+                    contents[pack].extend(file_s)
+        return contents
 
     def __str__(self):
         """
@@ -142,6 +421,31 @@ class Parser:
         """
         return text.decode("utf-8")
 
+    @staticmethod
+    def format_stats(
+        architecture: str, packages: list, title: Optional[str] = None
+    ) -> Tuple[str, list]:
+        """
+        Format package stats as a fixed-width table
+        Args:
+            architecture: the architecture (or any other label) for the header
+            packages: sorted packages & the no of files contained in them
+            title: title of the header, default "FOR ARCHITECTURE '<architecture>'"
+        Returns:
+            str: the header of the table
+            list: the rows of the table
+        """
+        if title is None:
+            title = f"FOR ARCHITECTURE '{architecture}'"
+        header_string = "{}:\n{:^40} {:>45}".format(
+            title, "PACKAGE NAME", "NUMBER OF FILES"
+        )
+        package_files_rows = [
+            "{:>5}. {:-<70} {}".format((ind + 1), val[0], val[1])
+            for ind, val in enumerate(packages)
+        ]
+        return header_string, package_files_rows
+
     @staticmethod
     def sort_dict_len(dictionary: dict, desc: bool = False) -> list:
         """
@@ -158,17 +462,24 @@ class Parser:
         """
         Helper function: Process raw text content for the given architecture using the two parsers (split or regex)
         Args:
-            data: packages & files data in list form, read from saved txt file
+            data: packages & files data in list form (or any iterable of rows), read from saved txt file
         Returns:
             None
+        Raises:
+            ParseError: if a package name in a row is empty
         """
         if self.verbosity:
             logging.info("Processing raw data...")
         for ind, val in enumerate(data):
-            if self.regex_parse:
-                packages, file_s = self._regex_parser(val)
-            else:
-                packages, file_s = Parser._split_parser(val)
+            packages, file_s = self.parse_row(val)
+
+            # share the package names & file paths with other parsers, kept in separate
+            # tables so the paths never show up as packages (e.g. in an ArchMatrix)
+            if packages and file_s:
+                if self.string_table is not None:
+                    packages = [self.string_table.intern(pack) for pack in packages]
+                if self.path_table is not None:
+                    file_s = [self.path_table.intern(file) for file in file_s]
 
             # file or package is missing ((more functionality req for finding if it's file or package (regex))
             if not file_s and packages:
@@ -176,14 +487,19 @@ class Parser:
                     f"File or Package missing in file @ {ind + 1} line, added to ungrouped data"
                 )
                 self.package_file_dict_len["ungrouped_data"] += 1
+                self.anomalies["ungrouped_rows"] += 1
+                if self.fingerprint:
+                    self._add_fingerprint("ungrouped_data", packages)
                 if self.get_contents:
-                    self.package_file_dict["ungrouped_data"].extend(packages[0])
+                    # one entry per ungrouped row, matching its count
+                    self.package_file_dict["ungrouped_data"].append(",".join(packages))
 
             # if both are missing, skip/ignore the row
             elif not file_s and not packages:
                 logging.warning(
                     f"Empty row - both file and Package missing in file @ {ind + 1} line, skipped"
                 )
+                self.anomalies["empty_rows"] += 1
                 continue
 
             # if the row is 'good' - both file and package present
@@ -193,18 +509,41 @@ class Parser:
                     logger.warning(
                         f"'Empty Package' found for '{packages[0]}' package @ {ind + 1} line in file"
                     )
+                    self.anomalies["empty_packages"] += 1
                     self.package_file_dict_len[packages[0]] = 0
+                    if self.fingerprint:
+                        self.package_fingerprint[packages[0]] = 0
                     if self.get_contents:
                         self.package_file_dict[packages[0]] = []
                 else:
+                    fingerprint = files_fingerprint(file_s) if self.fingerprint else 0
                     for pack in packages:
                         if not pack:
-                            logging.info(f"{pack}{ind + 1}{val}{file_s}")
-                            sys.exit()
+                            raise ParseError(
+                                f"Empty package name @ {ind + 1} line in file: {val}"
+                            )
                         self.package_file_dict_len[pack] += len(file_s)
+                        if self.fingerprint:
+                            self._add_fingerprint(pack, fingerprint=fingerprint)
                         if self.get_contents:
                             self.package_file_dict[pack].extend(file_s)
 
+    def _add_fingerprint(
+        self, package: str, file_s: Iterable[str] = (), fingerprint: int = 0
+    ) -> None:
+        """
+        Helper function: Add files (or their precomputed fingerprint) to the fingerprint of a package
+        Args:
+            package: the package name
+            file_s: the files to add
+            fingerprint: precomputed fingerprint of files to add
+        Returns:
+            None
+        """
+        self.package_fingerprint[package] = (
+            self.package_fingerprint[package] + fingerprint + files_fingerprint(file_s)
+        ) & MASK_64
+
     def _regex_parser(self, value: str) -> Tuple[list | str, list | str]:
         """
         Helper function: Parse based on regex match for the package(s),
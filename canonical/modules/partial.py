@@ -0,0 +1,296 @@
+"""Mergeable Partial Results for Parsing Shards (Map) & Combining them into Final Stats (Reduce)"""
+
+import gzip
+import json
+import logging
+import os
+from typing import Iterable, Optional, Tuple
+
+from .exceptions import ParseError, StorageError
+from .fingerprint import MASK_64
+from .parser import Parser
+
+logger = logging.getLogger(__name__)
+
+PARTIAL_VERSION = 2
+
+
+class PartialResult:
+    """
+    Counters, anomaly tallies & (optionally) fingerprints per group (architecture or snapshot),
+    merging is associative & commutative so partials can be reduced in any order,
+    shards are (group, file name, start, end) byte ranges with end None for the end of the file
+    """
+
+    def __init__(
+        self,
+        counts: Optional[dict] = None,
+        anomalies: Optional[dict] = None,
+        fingerprints: Optional[dict] = None,
+        shards: Optional[list] = None,
+    ):
+        self.counts = counts or {}
+        self.anomalies = anomalies or {}
+        self.fingerprints = fingerprints or {}
+        self.shards = [tuple(shard) for shard in shards or []]
+
+    @classmethod
+    def from_parser(
+        cls,
+        parser: Parser,
+        group: str,
+        file_name: str,
+        start: int = 0,
+        end: Optional[int] = None,
+    ) -> "PartialResult":
+        """
+        Create a partial from a parser which processed a shard
+        Args:
+            parser: the parser
+            group: label of the results, e.g. the architecture
+            file_name: base name of the data file of the shard
+            start: first byte offset of the shard
+            end: end byte offset of the shard, None for the end of the file
+        Returns:
+            PartialResult: the partial of the shard
+        """
+        return cls(
+            counts={group: dict(parser.package_file_dict_len)},
+            anomalies={group: dict(parser.anomalies)},
+            fingerprints=(
+                {group: dict(parser.package_fingerprint)} if parser.fingerprint else {}
+            ),
+            shards=[(group, file_name, start, end)],
+        )
+
+    def merge(self, other: "PartialResult") -> "PartialResult":
+        """
+        Merge two partials into a new one
+        Args:
+            other: the partial to merge with
+        Returns:
+            PartialResult: the merged partial
+        Raises:
+            ParseError: if shards of the partials overlap (rows would be counted twice),
+            or if only one of the partials has fingerprints for a group
+        """
+        for shard in self.shards:
+            for other_shard in other.shards:
+                if PartialResult._overlap(shard, other_shard):
+                    raise ParseError(
+                        f"Overlapping shards merged: {shard} and {other_shard}"
+                    )
+        for group in set(self.counts) & set(other.counts):
+            if (group in self.fingerprints) != (group in other.fingerprints):
+                raise ParseError(
+                    f"Fingerprints of '{group}' missing in some of the merged partials"
+                )
+        return PartialResult(
+            counts=PartialResult._merge_groups(
+                self.counts, other.counts, lambda a, b: a + b
+            ),
+            anomalies=PartialResult._merge_groups(
+                self.anomalies, other.anomalies, lambda a, b: a + b
+            ),
+            fingerprints=PartialResult._merge_groups(
+                self.fingerprints, other.fingerprints, lambda a, b: (a + b) & MASK_64
+            ),
+            shards=sorted(self.shards + other.shards, key=PartialResult._shard_key),
+        )
+
+    def top(self, group: str, top_n: Optional[int] = 10) -> list:
+        """
+        Get the top-n packages & the no of files of a group
+        Args:
+            group: label of the results, e.g. the architecture
+            top_n: no of top packages required, None for all packages
+        Returns:
+            list: reverse-sorted (desc) top-n packages & the no of files contained in them
+        """
+        return Parser.sort_dict_len(self.counts.get(group, {}), desc=True)[:top_n]
+
+    def write(self, filepath: str) -> None:
+        """
+        Write the partial as gzip compressed JSON
+        Args:
+            filepath: path of the partial file
+        Returns:
+            None
+        Raises:
+            StorageError: if the file cannot be written
+        """
+        try:
+            with gzip.open(filepath, "wt", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "version": PARTIAL_VERSION,
+                        "counts": self.counts,
+                        "anomalies": self.anomalies,
+                        "fingerprints": self.fingerprints,
+                        "shards": self.shards,
+                    },
+                    f,
+                )
+        except IOError as e:
+            raise StorageError(f"Error while writing partial result: {e}") from e
+
+    @classmethod
+    def read(cls, filepath: str) -> "PartialResult":
+        """
+        Read a partial written by write
+        Args:
+            filepath: path of the partial file
+        Returns:
+            PartialResult: the partial
+        Raises:
+            StorageError: if the file does not exist
+            ParseError: if the file is not a partial
+        """
+        try:
+            with gzip.open(filepath, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError as e:
+            raise StorageError(f"Partial result not found: {filepath}") from e
+        except (OSError, ValueError) as e:
+            raise ParseError(f"Not a partial result: {filepath}") from e
+        if not isinstance(data, dict) or data.get("version") != PARTIAL_VERSION:
+            raise ParseError(f"Not a partial result: {filepath}")
+        return cls(
+            counts=data["counts"],
+            anomalies=data["anomalies"],
+            fingerprints=data["fingerprints"],
+            shards=data["shards"],
+        )
+
+    @staticmethod
+    def _overlap(first: tuple, second: tuple) -> bool:
+        """
+        Helper function: Check if two shards share any byte of the same data file of a group
+        Args:
+            first: first shard as (group, file name, start, end)
+            second: second shard as (group, file name, start, end)
+        Returns:
+            bool: if the byte ranges of the shards intersect
+        """
+        if first[:2] != second[:2]:
+            return False
+        end = min(
+            (shard[3] for shard in (first, second) if shard[3] is not None),
+            default=None,
+        )
+        return end is None or max(first[2], second[2]) < end
+
+    @staticmethod
+    def _shard_key(shard: tuple) -> tuple:
+        """
+        Helper function: Sort key of a shard, an end of None sorts last
+        Args:
+            shard: shard as (group, file name, start, end)
+        Returns:
+            tuple: the sort key
+        """
+        group, file_name, start, end = shard
+        return group, file_name, start, end is None, end or 0
+
+    @staticmethod
+    def _merge_groups(first: dict, second: dict, combine) -> dict:
+        """
+        Helper function: Merge {group: {key: value}} mappings, combining values of common keys
+        Args:
+            first: first mapping
+            second: second mapping
+            combine: function combining two values
+        Returns:
+            dict: the merged mapping
+        """
+        merged = {group: dict(values) for group, values in first.items()}
+        for group, values in second.items():
+            target = merged.setdefault(group, {})
+            for key, value in values.items():
+                target[key] = combine(target[key], value) if key in target else value
+        return merged
+
+
+def shard_range(size: int, index: int, count: int) -> Tuple[int, int]:
+    """
+    Byte range of a shard when splitting data into equally sized shards
+    Args:
+        size: size of the (uncompressed) data in bytes
+        index: index of the shard, starting at 0
+        count: number of shards
+    Returns:
+        tuple: start & end byte offsets of the shard
+    """
+    return size * index // count, size * (index + 1) // count
+
+
+def map_shard(
+    architecture: str,
+    start: int = 0,
+    end: Optional[int] = None,
+    group: Optional[str] = None,
+    file_name: str = "data",
+    fingerprint: bool = False,
+    regex_parse: bool = False,
+) -> PartialResult:
+    """
+    Parse the rows of a shard of the data of an architecture into a partial
+    Args:
+        architecture: the architecture
+        start: first byte offset of the shard, needs the txt file if not 0
+        end: end byte offset of the shard, default till the end
+        group: label of the results, default the architecture
+        file_name: base name of the data file, e.g. of an older snapshot
+        fingerprint: if fingerprints are computed as well
+        regex_parse: if the regex-based parser is used
+    Returns:
+        PartialResult: the partial of the shard
+    """
+    parser = Parser(
+        architecture=architecture,
+        verbose=False,
+        regex_parse=regex_parse,
+        get_contents=False,
+        file_name=file_name,
+        fingerprint=fingerprint,
+    )
+    parser.parse_stream(parser.iter_lines(start=start, end=end))
+    return PartialResult.from_parser(
+        parser, group or architecture, file_name, start=start, end=end
+    )
+
+
+def reduce_partials(partials: Iterable[PartialResult]) -> PartialResult:
+    """
+    Merge any number of partials into one
+    Args:
+        partials: the partials
+    Returns:
+        PartialResult: the merged partial
+    """
+    result = PartialResult()
+    for partial in partials:
+        result = result.merge(partial)
+    return result
+
+
+def data_size(architecture: str, file_name: str = "data") -> int:
+    """
+    Size of the uncompressed data of an architecture, needed for splitting it into shards
+    Args:
+        architecture: the architecture
+        file_name: base name of the data file
+    Returns:
+        int: size in bytes
+    Raises:
+        StorageError: if the txt file does not exist
+    """
+    txt_filepath = os.path.join(
+        os.getcwd(), "files", (file_name + f"_{architecture}" + ".txt")
+    )
+    try:
+        return os.path.getsize(txt_filepath)
+    except OSError as e:
+        raise StorageError(
+            f"txt file needed for splitting into shards not found: {txt_filepath}"
+        ) from e
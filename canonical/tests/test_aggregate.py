@@ -0,0 +1,79 @@
+""" Cross-Architecture Aggregation Test """
+
+from canonical.modules.aggregate import ABSENT, ArchMatrix, StringTable
+from canonical.modules.parser import Parser
+
+
+def test_string_table_interning():
+    table = StringTable()
+    first = table.intern("".join(["pack", "age"]))
+    assert table.intern("".join(["pack", "age"])) is first
+    assert table.id("package") == 0
+    assert table.id("other") == 1
+    assert len(table) == 2
+
+
+def test_parsers_share_package_names(parser_process_data):
+    table = StringTable()
+    parsers = [
+        Parser(
+            architecture=arch,
+            verbose=False,
+            regex_parse=False,
+            get_contents=False,
+            string_table=table,
+        )
+        for arch in ("alpha123", "beta456")
+    ]
+    for parser in parsers:
+        parser._process_contents(parser_process_data)
+    keys_a = {key: key for key in parsers[0].package_file_dict_len}
+    for key in parsers[1].package_file_dict_len:
+        if key != "ungrouped_data":
+            assert keys_a[key] is key
+
+
+def test_arch_matrix_queries():
+    matrix = ArchMatrix()
+    matrix.add_architecture("amd64", [("p1", 5), ("p2", 1), ("p3", 0)])
+    matrix.add_architecture("arm64", [("p1", 3), ("p2", 1), ("p4", 7)])
+
+    assert list(matrix.column("amd64")) == [5, 1, 0, ABSENT]
+    assert matrix.top(2) == [("p1", 8), ("p4", 7)]
+    assert matrix.top(1, architectures=["amd64"]) == [("p1", 5)]
+    assert matrix.union() == ["p1", "p2", "p3", "p4"]
+    assert matrix.intersection() == ["p1", "p2"]
+    assert matrix.divergence("amd64", "arm64") == [("p1", 5, 3)]
+
+
+def test_paths_kept_out_of_matrix(parser_process_data):
+    matrix, path_table = ArchMatrix(), StringTable()
+    for arch in ("alpha123", "beta456"):
+        parser = Parser(
+            architecture=arch,
+            verbose=False,
+            regex_parse=False,
+            get_contents=True,
+            string_table=matrix.packages,
+            path_table=path_table,
+        )
+        parser._process_contents(parser_process_data)
+        matrix.add_architecture(arch, parser.package_file_dict_len.items())
+
+    assert "f1" not in matrix.packages.ids
+    assert "f1" in path_table.ids
+    assert [package for package, _ in matrix.top(6)] == [
+        "p5",
+        "p3",
+        "p2",
+        "ungrouped_data",
+        "p1",
+        "p4",
+    ]
+
+
+def test_format_stats_title():
+    header, rows = Parser.format_stats("'a', 'b'", [("p1", 3)], title="ACROSS 'a', 'b'")
+    assert header.startswith("ACROSS 'a', 'b':\n")
+    assert rows == [f"    1. p1{'-' * 68} 3"]
+    assert Parser.format_stats("a", [])[0].startswith("FOR ARCHITECTURE 'a':\n")
@@ -0,0 +1,99 @@
+""" Programmatic API Test """
+
+import gzip
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from canonical.modules.api import ContentsClient, Row, StatsResult
+from canonical.modules.cache import CacheStore
+from canonical.modules.downloader import Downloader
+from canonical.modules.exceptions import DownloadError, ParseError, StorageError
+from canonical.modules.parser import Parser
+
+
+@pytest.fixture
+def contents_client(cache_dir, parser_process_data):
+    data = "\n".join(parser_process_data[:7] + parser_process_data[9:]) + "\n"
+    (cache_dir / "data_alpha123.gz").write_bytes(gzip.compress(data.encode()))
+    return ContentsClient(base_url="https://testurl")
+
+
+def test_client_iter_rows(contents_client):
+    rows = list(contents_client.iter_rows("alpha123"))
+    assert rows[0] == Row(["p1"], ["f1"])
+    assert rows[-1] == Row(["p5"], ["f8", "f9", "f10", "f11"])
+
+
+def test_client_iter_counts(contents_client):
+    assert dict(contents_client.iter_counts("alpha123")) == {
+        "p1": 1,
+        "p2": 2,
+        "p3": 3,
+        "p4": 0,
+        "p5": 4,
+    }
+
+
+def test_client_stats_threads(contents_client):
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(
+            executor.map(lambda _: contents_client.stats("alpha123", top_n=2), range(8))
+        )
+    assert all(result == results[0] for result in results)
+    assert results[0] == StatsResult("alpha123", 5, 10, [("p5", 4), ("p3", 3)])
+
+
+def test_client_download_error(cache_dir, monkeypatch):
+    def get_failing_response(*args, **kwargs):
+        raise requests.exceptions.ConnectionError("no network")
+
+    monkeypatch.setattr(requests, "get", get_failing_response)
+    with pytest.raises(DownloadError):
+        ContentsClient(base_url="https://testurl").stats("alpha123")
+
+
+def test_parser_errors(cache_dir, parser_without_contents):
+    with pytest.raises(StorageError):
+        parser_without_contents.read_txt()
+    with pytest.raises(ParseError):
+        parser_without_contents._process_contents(["f1 p1,,p2"])
+
+
+def test_client_reuses_parsed_counts(contents_client, cache_dir, monkeypatch):
+    parses = []
+    parse_stream = Parser.parse_stream
+    monkeypatch.setattr(
+        Parser,
+        "parse_stream",
+        lambda self, *args: parses.append(1) or parse_stream(self, *args),
+    )
+    contents_client.stats("alpha123")
+    assert dict(contents_client.iter_counts("alpha123"))["p5"] == 4
+    assert len(parses) == 1
+
+    # a new download of the archive is parsed again
+    gzip_path = cache_dir / "data_alpha123.gz"
+    gzip_path.write_bytes(gzip.compress(b"f1 p6\n"))
+    os.utime(gzip_path, (time.time() + 10, time.time() + 10))
+    assert contents_client.stats("alpha123").top == [("p6", 1)]
+    assert len(parses) == 2
+
+
+def test_client_refresh_removes_stale_txt(cache_dir, monkeypatch):
+    (cache_dir / "data_alpha123.txt").write_text("f1 old\n")
+    monkeypatch.setattr(Downloader, "initiate", lambda self: None)
+    monkeypatch.setattr(
+        Downloader,
+        "save_gzip",
+        lambda self: (cache_dir / "data_alpha123.gz").write_bytes(
+            gzip.compress(b"f1 new\n")
+        ),
+    )
+    client = ContentsClient(cache=CacheStore(compressed_only=True))
+    client.fetch("alpha123", refresh=True)
+    assert not (cache_dir / "data_alpha123.txt").exists()
+    assert client.stats("alpha123").top == [("new", 1)]
@@ -0,0 +1,104 @@
+""" Cache Store Test """
+
+from canonical.modules.cache import CacheStore
+
+
+def write_artifact(files_dir, name, size):
+    path = files_dir / name
+    path.write_bytes(b"x" * size)
+    return str(path)
+
+
+def test_cache_register_and_stats(cache_dir):
+    cache = CacheStore()
+    cache.register(write_artifact(cache_dir, "data_a.gz", 10), "a", "archive")
+    cache.register(write_artifact(cache_dir, "data_a.txt", 100), "a", "index")
+    stats = cache.stats()
+    assert stats["total_bytes"] == 110
+    assert stats["architectures"]["a"]["kinds"] == {"archive": 10, "index": 100}
+
+    # index is persisted & reloaded
+    assert CacheStore().total_bytes() == 110
+
+
+def test_cache_prune_lru(cache_dir):
+    cache = CacheStore()
+    cold_gz = write_artifact(cache_dir, "data_cold.gz", 10)
+    cache.register(cold_gz, "cold", "archive")
+    cache.register(write_artifact(cache_dir, "data_cold.txt", 100), "cold", "index")
+    hot_gz = write_artifact(cache_dir, "data_hot.gz", 10)
+    cache.register(hot_gz, "hot", "archive")
+    cache.register(write_artifact(cache_dir, "data_hot.txt", 100), "hot", "index")
+    cache.touch(cold_gz)
+    cache.touch(hot_gz)
+
+    # derived file of the cold architecture goes first, then its archive
+    assert cache.prune(max_bytes=200) == ["data_cold.txt"]
+    assert cache.prune(max_bytes=110) == ["data_cold.gz"]
+    assert cache.is_resident(hot_gz)
+    assert not (cache_dir / "data_cold.gz").exists()
+
+
+def test_cache_prune_keep(cache_dir):
+    cache = CacheStore()
+    cache.register(write_artifact(cache_dir, "data_a.gz", 10), "a", "archive")
+    assert cache.prune(max_bytes=0, keep=["a"]) == []
+
+
+def test_cache_compressed_only(cache_dir):
+    cache = CacheStore(compressed_only=True)
+    cache.register(write_artifact(cache_dir, "data_a.gz", 10), "a", "archive")
+    cache.register(write_artifact(cache_dir, "data_a.txt", 100), "a", "index")
+    assert cache.prune() == ["data_a.txt"]
+    assert cache.total_bytes() == 10
+
+
+def test_cache_stats_files_never_evicted(cache_dir):
+    cache = CacheStore(compressed_only=True)
+    cache.register(write_artifact(cache_dir, "data_a.gz", 10), "a", "archive")
+    cache.register(write_artifact(cache_dir, "package_stats_a.txt", 100), "a", "stats")
+    assert cache.prune(max_bytes=10) == []
+    assert cache.prune(max_bytes=0) == ["data_a.gz"]
+    assert (cache_dir / "package_stats_a.txt").exists()
+
+
+def test_cache_fingerprint_snapshots_never_evicted(cache_dir):
+    cache = CacheStore()
+    cache.register(
+        write_artifact(cache_dir, "fingerprints_a_20261018.bin", 100),
+        "a",
+        "fingerprint",
+    )
+    cache.register(write_artifact(cache_dir, "data_b.gz", 100), "b", "archive")
+    assert cache.prune(max_bytes=50) == ["data_b.gz"]
+    assert (cache_dir / "fingerprints_a_20261018.bin").exists()
+
+
+def test_cache_pinned_not_in_budget(cache_dir):
+    cache = CacheStore()
+    cache.register(write_artifact(cache_dir, "data_a.gz", 10), "a", "archive")
+    cache.register(write_artifact(cache_dir, "package_stats_a.txt", 100), "a", "stats")
+    stats = cache.stats()
+    assert (stats["total_bytes"], stats["entries"]) == (10, 1)
+    assert (stats["pinned_bytes"], stats["pinned_entries"]) == (100, 1)
+    assert "Pinned outputs: 100 B in 1 files" in str(cache)
+
+
+def test_cache_budget_stored(cache_dir):
+    cache = CacheStore(max_bytes=10)
+    cache.register(write_artifact(cache_dir, "data_a.gz", 10), "a", "archive")
+    cache.register(write_artifact(cache_dir, "data_b.gz", 10), "b", "archive")
+
+    # a later store without a budget uses the stored one
+    cache = CacheStore()
+    assert cache.max_bytes == 10
+    assert cache.prune() == ["data_a.gz"]
+
+
+def test_cache_exports_never_evicted(cache_dir):
+    cache = CacheStore()
+    export = write_artifact(cache_dir, "columns_a_file_counts.npy", 100)
+    cache.register(export, "a", "export")
+    cache.register(write_artifact(cache_dir, "data_b.gz", 100), "b", "archive")
+    assert cache.prune(max_bytes=0) == ["data_b.gz"]
+    assert cache.is_resident(export)
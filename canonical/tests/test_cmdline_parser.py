@@ -18,3 +18,16 @@ def test_cmdline_parser_arch(monkeypatch):
     monkeypatch.setattr("sys.argv", ["main.py", "alpha123", "beta456", "-v"])
     assert args_parser().arch == ["alpha123", "beta456"]
     assert args_parser().verbose
+
+
+def test_cmdline_parser_cache_subcommand():
+    args = args_parser(["cache", "prune", "--cache-size", "2"])
+    assert args.command == "cache"
+    assert args.action == "prune"
+    assert args.cache_size == 2 * 1024 * 1024
+
+
+def test_cmdline_parser_bench_repeat(capsys):
+    with pytest.raises(SystemExit):
+        args_parser(["bench", "data.gz", "--repeat", "0"])
+    assert args_parser(["bench", "data.gz", "--repeat", "2"]).repeat == 2
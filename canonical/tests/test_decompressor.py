@@ -0,0 +1,97 @@
+""" Decompressor Test """
+
+import gzip
+import io
+import shutil
+
+import pytest
+
+from canonical.modules.decompressor import (
+    Decompressor,
+    ProcessDecompressor,
+    available_backends,
+    benchmark,
+    get_decompressor,
+)
+from canonical.modules.exceptions import ParseError
+
+
+@pytest.fixture
+def gzip_archive(tmp_path):
+    # two gzip members, like concatenated archives
+    path = tmp_path / "data.gz"
+    path.write_bytes(gzip.compress(b"f1 p1\n" * 1000) + gzip.compress(b"f2 p2\n"))
+    return path
+
+
+def test_zlib_decompress(gzip_archive):
+    data = Decompressor().decompress(gzip_archive.read_bytes())
+    assert data == b"f1 p1\n" * 1000 + b"f2 p2\n"
+
+
+def test_zlib_decompress_file(gzip_archive):
+    dst = io.BytesIO()
+    Decompressor().decompress_file(str(gzip_archive), dst, chunk_size=16)
+    assert dst.getvalue() == b"f1 p1\n" * 1000 + b"f2 p2\n"
+
+
+@pytest.mark.skipif(shutil.which("gzip") is None, reason="gzip not installed")
+def test_process_decompress_file(gzip_archive):
+    dst = io.BytesIO()
+    ProcessDecompressor("gzip", "gzip").decompress_file(str(gzip_archive), dst)
+    assert dst.getvalue() == b"f1 p1\n" * 1000 + b"f2 p2\n"
+
+
+def test_get_decompressor_fallback():
+    assert available_backends()[-1].name == "zlib"
+    assert get_decompressor("not-a-backend").name == "zlib"
+    assert get_decompressor() is available_backends()[0]
+
+
+def test_benchmark(gzip_archive):
+    results = benchmark(str(gzip_archive), repeat=1)
+    assert "zlib" in [name for name, _ in results]
+    assert all(throughput > 0 for _, throughput in results)
+
+
+@pytest.fixture
+def truncated_archive(tmp_path):
+    data = gzip.compress(bytes(range(256)) * 4000)
+    path = tmp_path / "truncated.gz"
+    path.write_bytes(data[: len(data) // 2])
+    return path
+
+
+@pytest.fixture
+def corrupt_archive(tmp_path):
+    data = bytearray(gzip.compress(b"f1 p1\n" * 1000))
+    data[20:40] = b"\xff" * 20
+    path = tmp_path / "corrupt.gz"
+    path.write_bytes(bytes(data))
+    return path
+
+
+@pytest.mark.parametrize("archive", ["truncated_archive", "corrupt_archive"])
+def test_zlib_invalid_archive(request, archive):
+    path = request.getfixturevalue(archive)
+    with pytest.raises(ParseError):
+        Decompressor().decompress(path.read_bytes())
+    with pytest.raises(ParseError):
+        Decompressor().decompress_file(str(path), io.BytesIO(), chunk_size=64)
+    with pytest.raises(ParseError):
+        with Decompressor().open(str(path)) as f:
+            f.read()
+
+
+@pytest.mark.skipif(shutil.which("gzip") is None, reason="gzip not installed")
+def test_process_invalid_archive(truncated_archive):
+    with pytest.raises(ParseError):
+        with ProcessDecompressor("gzip", "gzip").open(str(truncated_archive)) as f:
+            f.read()
+
+
+def test_downloader_save_txt_truncated(cache_dir, downloader, truncated_archive):
+    (cache_dir / "data_alpha123.gz").write_bytes(truncated_archive.read_bytes())
+    with pytest.raises(ParseError):
+        downloader.save_txt()
+    assert list(cache_dir.iterdir()) == [cache_dir / "data_alpha123.gz"]
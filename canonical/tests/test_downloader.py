@@ -3,6 +3,8 @@ import requests
 from requests.exceptions import ConnectionError, HTTPError, RequestException
 
 from canonical.conftest import MockResponse
+from canonical.modules.downloader import Downloader
+from canonical.modules.exceptions import StorageError
 
 
 @pytest.mark.parametrize(
@@ -24,3 +26,19 @@ def test_downloader_url_parser(downloader, downloader_url_parser: list):
     assert all([isinstance(arch, str) for arch in parsed_urls])
     assert parsed_urls[0] == "arch123"
     assert parsed_urls[1] == "arch123-arch456-arch789"
+
+
+def test_downloader_save_gzip_error(cache_dir, monkeypatch, downloader):
+    class BrokenResponse:
+        headers = {}
+
+        def iter_content(self, chunk_size):
+            yield b"partial"
+            raise IOError("connection reset")
+
+    monkeypatch.setattr(
+        Downloader, "request_soup", staticmethod(lambda url: (BrokenResponse(), None))
+    )
+    with pytest.raises(StorageError):
+        downloader.save_gzip()
+    assert list(cache_dir.iterdir()) == []
@@ -0,0 +1,78 @@
+""" Columnar Export Test """
+
+import pytest
+
+from canonical.modules.exceptions import StorageError
+from canonical.modules.export import ColumnarExporter, load_columns, read_npy
+from canonical.modules.parser import Parser
+
+
+def column_strings(blob, offsets):
+    data = bytes(blob)
+    return [data[offsets[i] : offsets[i + 1]].decode() for i in range(len(offsets) - 1)]
+
+
+def test_export_batches(tmp_path):
+    prefix = str(tmp_path / "columns_alpha123")
+    exporter = ColumnarExporter(prefix, contents=True)
+    exporter.write_batch([("p1", 2, ["f1", "f2"]), ("p2", 0, [])])
+    exporter.write_batch([("päckage", 1, ["/usr/bin/f3"])])
+    exporter.write_batch([])
+    exporter.close()
+
+    columns = load_columns(prefix)
+    assert column_strings(
+        columns["package_names"], columns["package_name_offsets"]
+    ) == ["p1", "p2", "päckage"]
+    assert list(columns["file_counts"]) == [2, 0, 1]
+    assert column_strings(columns["paths"], columns["path_offsets"]) == [
+        "f1",
+        "f2",
+        "/usr/bin/f3",
+    ]
+    assert list(columns["package_path_offsets"]) == [0, 2, 2, 3]
+
+
+def test_npy_header(tmp_path):
+    prefix = str(tmp_path / "columns")
+    ColumnarExporter(prefix).close()
+    with open(f"{prefix}_file_counts.npy", "rb") as f:
+        header = f.read(128)
+    assert header.startswith(b"\x93NUMPY\x01\x00")
+    assert b"'descr': '<u4', 'fortran_order': False, 'shape': (0,)" in header
+    assert header.endswith(b"\n")
+    assert len(read_npy(f"{prefix}_file_counts.npy")) == 0
+
+
+def test_parser_export_columns(cache_dir, parser_process_data):
+    parser = Parser(
+        architecture="alpha123", verbose=False, regex_parse=False, get_contents=False
+    )
+    parser._process_contents(parser_process_data)
+    file_paths = parser.export_columns(batch_size=2)
+    assert len(file_paths) == 3
+
+    columns = load_columns(str(cache_dir / "columns_alpha123"))
+    assert "paths" not in columns
+    assert list(columns["file_counts"]) == [4, 3, 2, 2, 1, 0]
+
+
+def test_parser_export_contents(cache_dir, parser_process_data):
+    parser = Parser(
+        architecture="alpha123", verbose=False, regex_parse=False, get_contents=True
+    )
+    parser._process_contents(parser_process_data)
+    parser.export_columns(batch_size=2)
+
+    columns = load_columns(str(cache_dir / "columns_alpha123"))
+    counts, offsets = columns["file_counts"], columns["package_path_offsets"]
+    assert len(offsets) == len(counts) + 1
+    for i in range(len(counts)):
+        assert counts[i] == offsets[i + 1] - offsets[i]
+    assert offsets[-1] == len(columns["path_offsets"]) - 1
+
+
+def test_exporter_open_error(tmp_path):
+    (tmp_path / "columns_paths.npy").mkdir()
+    with pytest.raises(StorageError):
+        ColumnarExporter(str(tmp_path / "columns"), contents=True)
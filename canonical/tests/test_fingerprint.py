@@ -0,0 +1,80 @@
+""" Fingerprint Test """
+
+import pytest
+
+from canonical.modules.exceptions import ParseError
+from canonical.modules.fingerprint import (
+    diff_snapshots,
+    files_fingerprint,
+    read_snapshot,
+    write_snapshot,
+)
+from canonical.modules.parser import Parser
+
+
+def test_fingerprint_order_independent():
+    assert files_fingerprint(["f1", "f2", "f3"]) == files_fingerprint(
+        ["f3", "f1", "f2"]
+    )
+    assert files_fingerprint(["f1", "f2"]) != files_fingerprint(["f1", "f3"])
+    assert 0 <= files_fingerprint(["f1", "f2"]) < 2**64
+
+
+def test_parser_fingerprints(parser_process_data):
+    parser = Parser(
+        architecture="alpha123",
+        verbose=False,
+        regex_parse=False,
+        get_contents=False,
+        fingerprint=True,
+    )
+    parser._process_contents(parser_process_data)
+    fingerprints = parser.package_fingerprint
+    assert fingerprints["p3"] == files_fingerprint(["f3", "f5", "f6"])
+    assert fingerprints["p5"] == files_fingerprint(["f8", "f9", "f10", "f11"])
+    assert fingerprints["p4"] == 0
+    assert not parser.package_file_dict
+
+
+def test_snapshot_roundtrip_and_diff(tmp_path):
+    old_path, new_path = str(tmp_path / "old.bin"), str(tmp_path / "new.bin")
+    write_snapshot(old_path, "amd64", {"p1": 1, "p2": 2}, {"p1": 11, "p2": 22})
+    write_snapshot(new_path, "amd64", {"p2": 2, "p3": 1}, {"p2": 23, "p3": 33})
+
+    arch, old = read_snapshot(old_path)
+    assert arch == "amd64"
+    assert old == {"p1": (1, 11), "p2": (2, 22)}
+
+    _, new = read_snapshot(new_path)
+    assert diff_snapshots(old, new) == {
+        "added": ["p3"],
+        "removed": ["p1"],
+        "changed": ["p2"],
+    }
+
+
+def test_parser_contents_for(cache_dir):
+    (cache_dir / "data_alpha123.txt").write_text("f1 p1\nf2 p2\nf3,f4 p1\n")
+    parser = Parser(
+        architecture="alpha123", verbose=False, regex_parse=False, get_contents=False
+    )
+    assert parser.contents_for(["p1"]) == {"p1": ["f1", "f3", "f4"]}
+
+
+def test_snapshot_corrupt(tmp_path):
+    path = tmp_path / "snapshot.bin"
+    write_snapshot(str(path), "amd64", {"p1": 1, "p2": 2}, {"p1": 11, "p2": 22})
+    data = path.read_bytes()
+    for corrupt in (data[:-3], data + b"\x00", data.replace(b"p2", b"\xff\xfe")):
+        path.write_bytes(corrupt)
+        with pytest.raises(ParseError):
+            read_snapshot(str(path))
+
+
+def test_write_fingerprints_needs_fingerprints(cache_dir, parser_process_data):
+    parser = Parser(
+        architecture="alpha123", verbose=False, regex_parse=False, get_contents=False
+    )
+    parser._process_contents(parser_process_data)
+    with pytest.raises(ParseError):
+        parser.write_fingerprints()
@@ -1,6 +1,11 @@
 """ Parser Test """
+import os
+import time
+
 import pytest
 
+from canonical.modules.parser import Parser
+
 
 @pytest.mark.parametrize(
     "unsorted_dict,sorted_dict_desc,sorted_dict_asc",
@@ -53,3 +58,25 @@ def test_contents_dict_empty(parser_without_contents, parser_process_data):
 def test_contents_dict_not_empty(parser_with_contents, parser_process_data):
     parser_with_contents._process_contents(parser_process_data)
     assert parser_with_contents.package_file_dict
+
+
+def test_parser_counts_cache(cache_dir, parser_process_data):
+    (cache_dir / "data_alpha123.gz").write_bytes(b"")
+    parser = Parser(
+        architecture="alpha123", verbose=False, regex_parse=False, get_contents=False
+    )
+    parser._process_contents(parser_process_data)
+    parser.save_counts()
+
+    cached = Parser(
+        architecture="alpha123", verbose=False, regex_parse=False, get_contents=False
+    )
+    assert cached.load_counts()
+    assert cached.package_file_dict_len == parser.package_file_dict_len
+    assert cached.anomalies == parser.anomalies
+
+    # a newer download makes the parse result stale
+    os.utime(cache_dir / "data_alpha123.gz", (time.time() + 10, time.time() + 10))
+    assert not Parser(
+        architecture="alpha123", verbose=False, regex_parse=False, get_contents=False
+    ).load_counts()
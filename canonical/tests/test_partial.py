@@ -0,0 +1,121 @@
+""" Map/Reduce Partial Results Test """
+
+import gzip
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from canonical.modules.exceptions import ParseError, StorageError
+from canonical.modules.parser import Parser
+from canonical.modules.partial import (
+    PartialResult,
+    data_size,
+    map_shard,
+    reduce_partials,
+    shard_range,
+)
+
+SHARDS = 3
+
+
+@pytest.fixture
+def shard_data(cache_dir, parser_process_data):
+    rows = parser_process_data[:7] + parser_process_data[9:]
+    (cache_dir / "data_alpha123.txt").write_text(("\n".join(rows) + "\n") * 5)
+    parser = Parser(
+        architecture="alpha123",
+        verbose=False,
+        regex_parse=False,
+        get_contents=False,
+        fingerprint=True,
+    )
+    parser.parse_stream()
+    return parser
+
+
+def map_to_file(index, out_path):
+    start, end = shard_range(data_size("alpha123"), index, SHARDS)
+    map_shard("alpha123", start=start, end=end, fingerprint=True).write(out_path)
+
+
+def test_shard_range():
+    ranges = [shard_range(10, index, 3) for index in range(3)]
+    assert ranges == [(0, 3), (3, 6), (6, 10)]
+
+
+def test_map_reduce_processes(shard_data, tmp_path):
+    out_paths = [str(tmp_path / f"part_{index}.json.gz") for index in range(SHARDS)]
+    with ProcessPoolExecutor(max_workers=SHARDS) as executor:
+        list(executor.map(map_to_file, range(SHARDS), out_paths))
+
+    result = reduce_partials(PartialResult.read(path) for path in out_paths)
+    assert result.counts == {"alpha123": dict(shard_data.package_file_dict_len)}
+    assert result.fingerprints == {"alpha123": dict(shard_data.package_fingerprint)}
+    assert result.anomalies == {"alpha123": {"empty_packages": 5}}
+    assert len(result.shards) == SHARDS
+
+
+def test_merge_associative(shard_data):
+    a, b, c = (
+        map_shard("alpha123", *shard_range(data_size("alpha123"), index, SHARDS))
+        for index in range(SHARDS)
+    )
+    left, right = a.merge(b).merge(c), a.merge(b.merge(c))
+    assert left.counts == right.counts == c.merge(a).merge(b).counts
+    assert left.shards == right.shards
+
+
+def test_read_invalid_partial(tmp_path):
+    path = tmp_path / "invalid.json.gz"
+    path.write_bytes(b"not a partial")
+    with pytest.raises(ParseError):
+        PartialResult.read(str(path))
+
+
+def test_merge_duplicate_shard(shard_data):
+    a, b = (
+        map_shard("alpha123", *shard_range(data_size("alpha123"), index, 2))
+        for index in range(2)
+    )
+    with pytest.raises(ParseError):
+        a.merge(b).merge(a)
+
+
+def test_byte_range_needs_txt(cache_dir, shard_data):
+    txt_path = cache_dir / "data_alpha123.txt"
+    (cache_dir / "data_alpha123.gz").write_bytes(gzip.compress(txt_path.read_bytes()))
+    txt_path.unlink()
+    assert map_shard("alpha123", end=10).counts["alpha123"]
+    with pytest.raises(StorageError):
+        map_shard("alpha123", start=10)
+
+
+def test_merge_overlapping_shards(shard_data):
+    size = data_size("alpha123")
+    with pytest.raises(ParseError):
+        map_shard("alpha123", 0, size // 2).merge(map_shard("alpha123", size // 4))
+    with pytest.raises(ParseError):
+        map_shard("alpha123").merge(map_shard("alpha123", 0, size // 2))
+
+    # adjacent shards & other groups or files do not overlap
+    merged = map_shard("alpha123", 0, size // 2).merge(map_shard("alpha123", size // 2))
+    assert merged.counts == {"alpha123": dict(shard_data.package_file_dict_len)}
+    assert merged.shards == [
+        ("alpha123", "data", 0, size // 2),
+        ("alpha123", "data", size // 2, None),
+    ]
+    merged.merge(map_shard("alpha123", group="other"))
+
+
+def test_merge_partial_fingerprints(shard_data, tmp_path):
+    size = data_size("alpha123")
+    with pytest.raises(ParseError):
+        map_shard("alpha123", 0, size // 2, fingerprint=True).merge(
+            map_shard("alpha123", size // 2)
+        )
+
+    # shards survive writing & reading the partial
+    path = str(tmp_path / "part.json.gz")
+    map_shard("alpha123", 0, size // 2).write(path)
+    with pytest.raises(ParseError):
+        PartialResult.read(path).merge(map_shard("alpha123", 10, size // 2))